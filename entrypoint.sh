@@ -0,0 +1,14 @@
+#!/bin/sh
+# Starts the web server. SERVER_MODE=asgi runs the ASGI app under uvicorn
+# (needed for /api/events/ and the async read views); anything else keeps the
+# gunicorn WSGI setup.
+set -e
+
+PORT="${PORT:-8080}"
+
+if [ "$SERVER_MODE" = "asgi" ]; then
+    exec uvicorn laboratory_sample_tracker.asgi:application \
+        --host 0.0.0.0 --port "$PORT" --workers "${WEB_CONCURRENCY:-1}" --proxy-headers
+fi
+
+exec gunicorn --bind "0.0.0.0:$PORT" laboratory_sample_tracker.wsgi:application
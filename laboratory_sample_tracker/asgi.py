@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'laboratory_sample_tracker.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up. Serves /api/events/ and hands everything
+# else to Django.
+from samples.asgi import EventStreamApp  # noqa: E402
+
+application = EventStreamApp(django_application)
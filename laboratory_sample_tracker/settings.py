@@ -50,6 +50,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its total time covers the rest of the stack.
+    'samples.metrics.RequestMetricsMiddleware',
+    'samples.compression.CompressionMiddleware',
+    'samples.throttling.ThrottleMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -85,13 +89,43 @@ WSGI_APPLICATION = 'laboratory_sample_tracker.wsgi.application'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 DATABASE_URL = os.environ.get('DATABASE_URL', f'sqlite:///{BASE_DIR / "db.sqlite3"}')
 
+# Connections are kept for CONN_MAX_AGE seconds and checked before reuse,
+# so a connection dropped by the database or a pooler is replaced rather
+# than failing the next request.
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', 600))
+
 DATABASES = {
     'default': dj_database_url.parse(
         DATABASE_URL,
-        conn_max_age=600
+        conn_max_age=CONN_MAX_AGE,
+        conn_health_checks=True
     )
 }
 
+# Optional read replica. Safe requests to the sample and task endpoints read
+# from it (see samples.replicas), except for REPLICA_READ_YOUR_WRITES_SECONDS
+# after the same user writes. Use a shared REPLICA_PIN_CACHE when running
+# several instances, so every instance sees the pin.
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+REPLICA_DATABASE = None
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=CONN_MAX_AGE,
+        conn_health_checks=True
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASE = 'replica'
+DATABASE_ROUTERS = ['samples.replicas.ReplicaRouter'] if REPLICA_DATABASE else []
+REPLICA_READ_YOUR_WRITES_SECONDS = int(os.environ.get('REPLICA_READ_YOUR_WRITES_SECONDS', 5))
+REPLICA_PIN_CACHE = os.environ.get('REPLICA_PIN_CACHE', 'default')
+
+# Behind PgBouncer (or another pooler) in transaction mode, where a
+# server-side cursor cannot outlive its transaction.
+if os.environ.get('DATABASE_POOL_MODE') == 'transaction':
+    for database in DATABASES.values():
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -137,10 +171,102 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'samples.authentication.CachedTokenAuthentication',
+    ],
+    # orjson-backed when installed; the output is the same as DRF's.
+    'DEFAULT_RENDERER_CLASSES': [
+        'samples.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'samples.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
+    # Reverse proxies in front of the app, so client IPs are read from
+    # X-Forwarded-For (see THROTTLE). 0 uses REMOTE_ADDR: without trusted
+    # proxies the header is client-controlled and would dodge the limits.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES') or 0),
+}
+
+# Token-bucket throttles, checked by samples.throttling.ThrottleMiddleware
+# before authentication or any query. A rate '<requests>/<period>' (s, min,
+# hour, day) allows a burst of that many requests, earned back evenly over
+# the period. Requests with a token already authenticated by the process
+# count per token, the rest per client IP; login and registration always
+# per IP. Bulk covers the bulk create,
+# transitions and exports. SHARED_CACHE is a CACHES alias that enforces the
+# limits across processes as well as within each one.
+THROTTLE = {
+    'ENABLED': os.environ.get('THROTTLE_ENABLED', 'True') == 'True',
+    'RATES': {
+        'read': os.environ.get('THROTTLE_READ_RATE', '1200/min'),
+        'write': os.environ.get('THROTTLE_WRITE_RATE', '300/min'),
+        'bulk': os.environ.get('THROTTLE_BULK_RATE', '30/min'),
+        'login': os.environ.get('THROTTLE_LOGIN_RATE', '10/min'),
+    },
+    'MAX_BUCKETS': int(os.environ.get('THROTTLE_MAX_BUCKETS', 100000)),
+    'SHARED_CACHE': os.environ.get('THROTTLE_SHARED_CACHE') or None,
+}
+
+# Audit logs older than this many days are moved to the archive table by
+# `manage.py archive_audit_logs`; run it from cron.
+AUDIT_LOG_HOT_DAYS = int(os.environ.get('AUDIT_LOG_HOT_DAYS', 90))
+
+# /api/analytics/results/ caches each computed result in this CACHES alias.
+# Keys include the newest sample change, so the TTL only bounds memory.
+ANALYTICS_CACHE = os.environ.get('ANALYTICS_CACHE', 'default')
+ANALYTICS_CACHE_TTL = int(os.environ.get('ANALYTICS_CACHE_TTL', 3600))
+
+# Responses smaller than this many bytes are sent uncompressed.
+COMPRESSION_MIN_LENGTH = int(os.environ.get('COMPRESSION_MIN_LENGTH', 1024))
+
+# Token lookups are cached per process for TTL seconds. Set SHARED_CACHE to a
+# CACHES alias to also share them between processes.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': int(os.environ.get('TOKEN_AUTH_CACHE_MAX_SIZE', 10000)),
+    'TTL': int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 60)),
+    'SHARED_CACHE': os.environ.get('TOKEN_AUTH_SHARED_CACHE') or None,
 }
 
+# Email
+# Notifications are queued in the outbox and sent by `manage.py send_outbox`.
+# Use 'django.core.mail.backends.console.EmailBackend' to print them locally.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+
+# Logging
+# samples.metrics logs one JSON line per request at INFO, and a WARNING
+# for requests that repeat a query like an N+1.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'samples': {
+            'handlers': ['console'],
+            'level': os.environ.get('SAMPLES_LOG_LEVEL', 'INFO'),
+        },
+        'samples.metrics': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_METRICS_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+# Server mode
+# 'asgi' when served by uvicorn (see entrypoint.sh). Turns on the async read
+# views, which only pay off when nothing holds a worker while they wait.
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+ASYNC_READ_VIEWS = SERVER_MODE == 'asgi'
+
+# Live events (/api/events/)
+# The default broker only reaches listeners in the same process; point this
+# at a broker backed by a shared bus when running several server processes.
+EVENT_BROKER = os.environ.get('EVENT_BROKER', 'samples.events.InProcessBroker')
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "https://laboratory-sample-tracker-client.vercel.app",
@@ -0,0 +1,19 @@
+"""
+Settings for the test suite. `manage.py test` uses them by default; with
+another runner, set DJANGO_SETTINGS_MODULE=laboratory_sample_tracker.test_settings.
+"""
+import dj_database_url
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASE_REPLICA_URL, DATABASES, THROTTLE
+
+# The in-memory SQLite test database fails concurrent writers outright;
+# a file makes them wait for the lock, as the concurrency tests need.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['TEST'] = {'NAME': str(BASE_DIR / 'test-db.sqlite3')}
+
+if not DATABASE_REPLICA_URL:
+    # A second, separate database so the tests can tell where reads went.
+    DATABASES['replica'] = dj_database_url.parse(f'sqlite:///{BASE_DIR / "db-replica.sqlite3"}')
+
+# Every test request comes from one address; ThrottleTests turn it back on.
+THROTTLE = {**THROTTLE, 'ENABLED': False}
@@ -1,7 +1,52 @@
+from itertools import groupby
+from operator import itemgetter
 from django.contrib import admin
-from .models import Task, AuditLog, Sample
+from django.db import transaction
+from .changes import record_changes
+from .models import Task, ArchivedAuditLog, AuditLog, ChangeKind, OutboxEmail, Sample
 
-# Register your models here.
-admin.site.register(Task)
-admin.site.register(AuditLog)
-admin.site.register(Sample)
\ No newline at end of file
+class ChangeFeedAdmin(admin.ModelAdmin):
+    """
+    Records admin writes in the owner's change feed (see samples.changes),
+    as the API views do, so clients syncing with /api/changes/ see them.
+    `owner_lookup` is the path from the model to its owner's id.
+    """
+    change_kind = None
+    owner_lookup = None
+
+    def owner_id(self, obj):
+        return self.model.objects.filter(pk=obj.pk).values_list(self.owner_lookup, flat=True).first()
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        record_changes(self.owner_id(obj), self.change_kind, [obj.pk])
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            record_changes(self.owner_id(obj), self.change_kind, [obj.pk], deleted=True)
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            rows = queryset.order_by(self.owner_lookup).values_list(self.owner_lookup, 'pk')
+            for owner_id, group in groupby(rows, key=itemgetter(0)):
+                record_changes(owner_id, self.change_kind, [pk for _, pk in group], deleted=True)
+            super().delete_queryset(request, queryset)
+
+@admin.register(Sample)
+class SampleAdmin(ChangeFeedAdmin):
+    change_kind = ChangeKind.SAMPLE
+    owner_lookup = 'owner_id'
+
+@admin.register(Task)
+class TaskAdmin(ChangeFeedAdmin):
+    change_kind = ChangeKind.TASK
+    owner_lookup = 'sample__owner_id'
+
+@admin.register(AuditLog)
+class AuditLogAdmin(ChangeFeedAdmin):
+    change_kind = ChangeKind.AUDIT_LOG
+    owner_lookup = 'sample__owner_id'
+
+admin.site.register(ArchivedAuditLog)
+admin.site.register(OutboxEmail)
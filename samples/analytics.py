@@ -0,0 +1,167 @@
+import hashlib
+import math
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from itertools import chain, islice
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Avg, Count, FloatField, Max
+from django.db.models.functions import Cast, TruncDay, TruncMonth, TruncWeek
+from rest_framework.exceptions import ValidationError
+from .exports import filter_range
+from .models import Sample, Task
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - NumPy is optional
+    numpy = None
+
+# Rows are read from the database in chunks of this size.
+CHUNK_SIZE = 10000
+PERCENTILES = (5, 25, 50, 75, 95)
+# Control limits are the mean plus or minus this many standard deviations.
+CONTROL_SIGMA = 3
+BUCKETS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+def parse_limit(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        limit = float(value)
+    except ValueError:
+        limit = math.nan
+    if not math.isfinite(limit):
+        raise ValidationError({name: ['Must be a number.']})
+    return limit
+
+def result_tasks(user, params):
+    """The user's tasks with a numeric result, filtered by `task` names and `from`/`to` on updated_at."""
+    tasks = Task.objects.filter(sample__owner=user, result_numeric__isnull=False)
+    names = params.getlist('task')
+    if names:
+        tasks = tasks.filter(name__in=names)
+    return filter_range(tasks, params, 'updated_at')
+
+def load_values(tasks):
+    """
+    Each task name's results as a float array (a list without NumPy). Rows
+    come from values_list() in chunks, cast to float by the database, so no
+    Task or Decimal objects are built.
+    """
+    rows = tasks.annotate(value=Cast('result_numeric', FloatField())).values_list('name', 'value')
+    parts = defaultdict(list)
+    iterator = rows.iterator(chunk_size=CHUNK_SIZE)
+    while chunk := list(islice(iterator, CHUNK_SIZE)):
+        grouped = defaultdict(list)
+        for name, value in chunk:
+            grouped[name].append(value)
+        for name, values in grouped.items():
+            parts[name].append(numpy.array(values) if numpy is not None else values)
+    if numpy is not None:
+        return {name: numpy.concatenate(arrays) for name, arrays in parts.items()}
+    return {name: list(chain.from_iterable(lists)) for name, lists in parts.items()}
+
+def interpolated(sorted_values, fraction):
+    """Linear-interpolation percentile, the same as numpy.percentile's default."""
+    position = fraction * (len(sorted_values) - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def describe(values, lower_spec=None, upper_spec=None):
+    """Count, mean, sample standard deviation, percentiles and limit flags of a non-empty set of results."""
+    count = len(values)
+    if numpy is not None:
+        values = numpy.sort(values)
+        mean = float(values.mean())
+        stddev = float(values.std(ddof=1)) if count > 1 else None
+        percentiles = [float(value) for value in numpy.percentile(values, PERCENTILES)]
+    else:
+        values = sorted(values)
+        mean = math.fsum(values) / count
+        stddev = math.sqrt(math.fsum((value - mean) ** 2 for value in values) / (count - 1)) if count > 1 else None
+        percentiles = [interpolated(values, percent / 100) for percent in PERCENTILES]
+
+    def outside(low, high):
+        # The values are sorted, so counting those beyond a limit is a binary search.
+        if numpy is not None:
+            below = int(numpy.searchsorted(values, low, side='left')) if low is not None else 0
+            above = count - int(numpy.searchsorted(values, high, side='right')) if high is not None else 0
+        else:
+            below = bisect_left(values, low) if low is not None else 0
+            above = count - bisect_right(values, high) if high is not None else 0
+        return below + above
+
+    control = None
+    if stddev is not None:
+        control = {'lower': mean - CONTROL_SIGMA * stddev, 'upper': mean + CONTROL_SIGMA * stddev}
+    specified = lower_spec is not None or upper_spec is not None
+    return {
+        'count': count,
+        'mean': round(mean, 6),
+        'stddev': round(stddev, 6) if stddev is not None else None,
+        'min': round(float(values[0]), 6),
+        'max': round(float(values[-1]), 6),
+        'percentiles': {f'p{percent}': round(value, 6) for percent, value in zip(PERCENTILES, percentiles)},
+        'control_limits': {key: round(value, 6) for key, value in control.items()} if control else None,
+        'out_of_control': outside(control['lower'], control['upper']) if control else 0,
+        'out_of_spec': outside(lower_spec, upper_spec) if specified else None,
+    }
+
+def trend(tasks, bucket):
+    """Per task name, the count and mean of results in each time bucket of updated_at, in one GROUP BY."""
+    rows = (
+        tasks.annotate(bucket=BUCKETS[bucket]('updated_at'))
+        .values('name', 'bucket')
+        .annotate(count=Count('id'), mean=Avg(Cast('result_numeric', FloatField())))
+        .order_by('name', 'bucket')
+    )
+    buckets = defaultdict(list)
+    for row in rows:
+        buckets[row['name']].append({
+            'bucket': row['bucket'].date().isoformat(),
+            'count': row['count'],
+            'mean': round(row['mean'], 6),
+        })
+    return buckets
+
+def validators(user):
+    """
+    The newest sample updated_at and the sample count, from the
+    (owner, updated_at) index. Task changes touch their sample's updated_at.
+    """
+    result = Sample.objects.filter(owner=user).aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    return result['last_modified'], result['count']
+
+def result_analytics(user, params, current=None):
+    """
+    The /api/analytics/results/ payload for `user`, cached under the query
+    parameters and `current` (the validators), so any change to the user's
+    samples or tasks makes a new entry.
+    """
+    bucket = params.get('bucket', 'week')
+    if bucket not in BUCKETS:
+        raise ValidationError({'bucket': [f"Must be one of: {', '.join(BUCKETS)}."]})
+    lower_spec, upper_spec = parse_limit(params, 'lsl'), parse_limit(params, 'usl')
+    tasks = result_tasks(user, params)
+
+    current = current if current is not None else validators(user)
+    query = '&'.join(f'{key}={value}' for key, values in sorted(params.lists()) for value in sorted(values))
+    digest = hashlib.sha1(f'{query}|{current[0]}|{current[1]}'.encode('utf-8')).hexdigest()
+    key = f'result-analytics:{user.pk}:{digest}'
+    cache = caches[settings.ANALYTICS_CACHE]
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    trends = trend(tasks, bucket)
+    result = {
+        'bucket': bucket,
+        'tasks': [
+            {'name': name, **describe(values, lower_spec, upper_spec), 'trend': trends.get(name, [])}
+            for name, values in sorted(load_values(tasks).items())
+        ],
+    }
+    cache.set(key, result, settings.ANALYTICS_CACHE_TTL)
+    return result
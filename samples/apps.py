@@ -5,4 +5,6 @@ class SamplesConfig(AppConfig):
     name = 'samples'
 
     def ready(self):
-        import samples.signals
\ No newline at end of file
+        import samples.signals
+        from samples.metrics import install_serializer_timing
+        install_serializer_timing()
\ No newline at end of file
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from .models import ArchivedAuditLog, AuditLog
+
+ARCHIVE_FIELDS = ('id', 'sample_id', 'actor_id', 'action', 'timestamp')
+
+def archivable(cutoff):
+    """
+    Audit logs older than `cutoff`, except each sample's latest entry, which
+    stays in AuditLog for the sample list's latest action.
+    """
+    newer = AuditLog.objects.filter(sample=OuterRef('sample')).filter(
+        Q(timestamp__gt=OuterRef('timestamp')) | Q(timestamp=OuterRef('timestamp'), id__gt=OuterRef('id'))
+    )
+    return AuditLog.objects.filter(timestamp__lt=cutoff).filter(Exists(newer))
+
+def archive_batch(cutoff, batch_size):
+    """Move the oldest `batch_size` archivable logs to ArchivedAuditLog; returns how many moved."""
+    with transaction.atomic():
+        rows = list(archivable(cutoff).order_by('timestamp', 'id').values(*ARCHIVE_FIELDS)[:batch_size])
+        ArchivedAuditLog.objects.bulk_create([ArchivedAuditLog(**row) for row in rows], ignore_conflicts=True)
+        AuditLog.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+def audit_tiers(user, sample_pk=None):
+    """The recent and archived audit logs of the user's samples, or of one of them."""
+    tiers = [AuditLog.objects.filter(sample__owner=user), ArchivedAuditLog.objects.filter(sample__owner=user)]
+    if sample_pk is not None:
+        tiers = [queryset.filter(sample_id=sample_pk) for queryset in tiers]
+    return tiers
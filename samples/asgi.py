@@ -0,0 +1,108 @@
+import asyncio
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+from .authentication import CachedTokenAuthentication
+from . import events
+
+KEEPALIVE_SECONDS = 15
+
+class EventStreamApp:
+    """
+    ASGI app serving the server-sent events stream at `path` and passing
+    every other request on to `app` (the Django application).
+
+    The stream pushes `sample.status` and `task.status` changes and new
+    `audit_log` entries for the authenticated user once each write commits.
+    Authenticate with `Authorization: Token ...`, or `?token=` for
+    EventSource clients that cannot set headers. A `resync` event means
+    events were dropped for a slow client, which should catch up through
+    /api/changes/.
+
+    It sits in front of Django so it can see the client disconnect and
+    release the subscription; an idle connection costs one coroutine and a
+    keepalive comment every KEEPALIVE_SECONDS.
+    """
+    def __init__(self, app, path='/api/events/'):
+        self.app = app
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] != self.path:
+            return await self.app(scope, receive, send)
+
+        headers = self.cors_headers(scope)
+        if scope['method'] != 'GET':
+            return await self.reject(send, 405, 'Method not allowed.', headers + [(b'allow', b'GET')])
+
+        key = parse_qs(scope['query_string'].decode('latin-1')).get('token', [None])[0]
+        auth = dict(scope['headers']).get(b'authorization', b'').decode('latin-1').split()
+        if len(auth) == 2 and auth[0].lower() == 'token':
+            key = auth[1]
+        if not key:
+            return await self.reject(send, 401, 'Authentication credentials were not provided.', headers)
+        try:
+            user, _ = await sync_to_async(CachedTokenAuthentication().authenticate_credentials)(key)
+        except AuthenticationFailed as e:
+            return await self.reject(send, 401, str(e.detail), headers)
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': headers + [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await self.stream(user.pk, receive, send)
+
+    async def stream(self, user_id, receive, send):
+        broker = events.get_broker()
+        subscription = broker.subscribe(user_id)
+        disconnected = asyncio.ensure_future(self.wait_for_disconnect(receive))
+        try:
+            await self.write(send, 'retry: 5000\n\n')
+            while True:
+                next_event = asyncio.ensure_future(subscription.queue.get())
+                done, _ = await asyncio.wait(
+                    {next_event, disconnected}, timeout=KEEPALIVE_SECONDS, return_when=asyncio.FIRST_COMPLETED
+                )
+                if next_event not in done:
+                    next_event.cancel()
+                if disconnected in done:
+                    break
+                if next_event not in done:
+                    await self.write(send, ': keepalive\n\n')
+                    continue
+                await self.write(send, events.format_sse(next_event.result()))
+                if subscription.overflowed and subscription.queue.empty():
+                    subscription.overflowed = False
+                    await self.write(send, events.format_sse({'type': 'resync'}))
+        finally:
+            disconnected.cancel()
+            broker.unsubscribe(subscription)
+
+    async def wait_for_disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def write(self, send, text):
+        await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+
+    async def reject(self, send, status, detail, headers):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers + [(b'content-type', b'application/json')],
+        })
+        await send({'type': 'http.response.body', 'body': JSONEncoder().encode({'detail': detail}).encode('utf-8')})
+
+    def cors_headers(self, scope):
+        """The CORS headers django-cors-headers would add, which this app bypasses."""
+        origin = dict(scope['headers']).get(b'origin', b'').decode('latin-1')
+        if origin and origin in getattr(settings, 'CORS_ALLOWED_ORIGINS', []):
+            return [(b'access-control-allow-origin', origin.encode('latin-1')), (b'vary', b'Origin')]
+        return []
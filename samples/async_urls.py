@@ -0,0 +1,12 @@
+from django.urls import path, re_path
+from .async_views import SampleDetailView, SampleListView, TaskListView, UserView
+from .urls import urlpatterns as sync_urlpatterns
+
+# Used instead of samples.urls when ASYNC_READ_VIEWS is on (the ASGI server).
+# These routes shadow the DRF ones and hand anything but JSON reads back to them.
+urlpatterns = [
+    path('user/', UserView.as_view(), name='user-detail'),
+    re_path(r'^samples/$', SampleListView.as_view(), name='sample-list'),
+    re_path(r'^samples/(?P<pk>[0-9]+)/$', SampleDetailView.as_view(), name='sample-detail'),
+    re_path(r'^samples/(?P<sample_pk>[0-9]+)/tasks/$', TaskListView.as_view(), name='sample-tasks-list'),
+] + sync_urlpatterns
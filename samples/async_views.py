@@ -0,0 +1,166 @@
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from .authentication import token_cache
+from .conditional import check_conditional, etag_only
+from .models import AuditLog, Sample, Task
+from .pagination import SampleCursorPagination
+from .renderers import FastJSONRenderer
+from .serializers import ReadOnlyUserSerializer, SampleListSerializer, SampleSerializer, TaskSerializer
+from .views import SampleViewSet, TaskViewSet, UserDetailView, list_validators, with_list_annotations
+
+async def authenticate(request):
+    """
+    The active user behind the request's `Authorization: Token ...` header,
+    or None when there is no usable token (DRF then answers with its 401).
+    """
+    auth = request.headers.get('Authorization', '').split()
+    if len(auth) != 2 or auth[0].lower() != 'token':
+        return None
+    key = auth[1]
+    cached = token_cache.get_local(key)
+    if cached is not None:
+        return cached[0]
+    try:
+        token = await Token.objects.select_related('user').aget(key=key)
+    except Token.DoesNotExist:
+        return None
+    if not token.user.is_active:
+        return None
+    await sync_to_async(token_cache.set)(key, token.user, token)
+    return token.user
+
+def set_prefetched(instance, name, queryset, objects):
+    """Store rows fetched separately as if prefetch_related had loaded them."""
+    queryset._result_cache = objects
+    queryset._prefetch_done = True
+    if not hasattr(instance, '_prefetched_objects_cache'):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[name] = queryset
+
+class AsyncReadView(View):
+    """
+    Serves JSON GETs with the async ORM, so a slow query under the ASGI
+    server waits on the event loop instead of holding a worker. Every other
+    request (writes, the browsable API, missing or bad credentials, options
+    the async path does not cover) is handed to the DRF view in `fallback`,
+    which also keeps error responses identical.
+
+    Subclasses implement `read()` returning `(validators, build)`, where
+    `build` is a coroutine function producing the response data, or None to
+    fall back. `validators` work as in ConditionalGetMixin.
+    """
+    fallback = None
+    allow = 'GET, HEAD, OPTIONS'
+    # Throttled like the DRF views, by method (see samples.throttling).
+    throttle_scope = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Like the DRF views it stands in for: token auth needs no CSRF check.
+        view.csrf_exempt = True
+        return view
+
+    def accepts_json(self, request):
+        return 'format' not in request.GET and 'text/html' not in request.headers.get('Accept', '')
+
+    async def get(self, request, *args, **kwargs):
+        user = await authenticate(request) if self.accepts_json(request) else None
+        read = await self.read(request, user, *args, **kwargs) if user is not None else None
+        if read is None:
+            return await sync_to_async(self.fallback)(request, *args, **kwargs)
+
+        validators, build = read
+        not_modified, headers = check_conditional(request, user, validators)
+        if not_modified is not None:
+            return not_modified
+        response = HttpResponse(FastJSONRenderer().render(await build()), content_type='application/json')
+        response['Vary'] = 'Accept'
+        response['Allow'] = self.allow
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(self.fallback)(request, *args, **kwargs)
+
+    put = patch = delete = options = post
+
+    async def read(self, request, user, *args, **kwargs):
+        raise NotImplementedError
+
+class SampleListView(AsyncReadView):
+    fallback = staticmethod(SampleViewSet.as_view({'get': 'list', 'post': 'create'}))
+    allow = 'GET, POST, HEAD, OPTIONS'
+
+    async def read(self, request, user):
+        if request.GET.get('expand') == 'full':
+            # Django 4.2 cannot prefetch from the async ORM.
+            return None
+        samples = Sample.objects.filter(owner=user)
+        result = await samples.aaggregate(last_modified=Max('updated_at'), count=Count('id'))
+
+        async def build():
+            drf_request = Request(request)
+            paginator = SampleCursorPagination()
+            # The paginator evaluates the page itself; run it where it may.
+            page = await sync_to_async(paginator.paginate_queryset)(
+                with_list_annotations(samples.select_related('owner')), drf_request
+            )
+            data = SampleListSerializer(page, many=True, context={'request': drf_request}).data
+            return paginator.get_paginated_response(data).data
+
+        return list_validators(result), build
+
+class SampleDetailView(AsyncReadView):
+    fallback = staticmethod(SampleViewSet.as_view({
+        'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'
+    }))
+    allow = 'GET, PUT, PATCH, DELETE, HEAD, OPTIONS'
+
+    async def read(self, request, user, pk):
+        samples = Sample.objects.filter(owner=user, pk=pk)
+        validators = await samples.values_list('updated_at', 'id', 'version').afirst()
+        if validators is None:
+            return None
+
+        async def build():
+            sample = await samples.select_related('owner').aget()
+            tasks = Task.objects.filter(sample=sample).select_related('analyst')
+            logs = AuditLog.objects.filter(sample=sample).select_related('actor')
+            set_prefetched(sample, 'tasks', tasks, [task async for task in tasks.aiterator()])
+            set_prefetched(sample, 'audit_logs', logs, [log async for log in logs.aiterator()])
+            return SampleSerializer(sample, context={'request': Request(request)}).data
+
+        return etag_only(validators), build
+
+class TaskListView(AsyncReadView):
+    fallback = staticmethod(TaskViewSet.as_view({'get': 'list', 'post': 'create'}))
+    allow = 'GET, POST, HEAD, OPTIONS'
+
+    async def read(self, request, user, sample_pk):
+        validators = await Sample.objects.filter(pk=sample_pk, owner=user).values_list('updated_at', 'id').afirst()
+        if validators is None:
+            # The DRF view answers the 404.
+            return None
+
+        async def build():
+            tasks = Task.objects.filter(sample_id=sample_pk, sample__owner=user).select_related('analyst')
+            return TaskSerializer(
+                [task async for task in tasks.aiterator()], many=True, context={'request': Request(request)}
+            ).data
+
+        return etag_only(validators), build
+
+class UserView(AsyncReadView):
+    fallback = staticmethod(UserDetailView.as_view())
+
+    async def read(self, request, user):
+        async def build():
+            return ReadOnlyUserSerializer(user).data
+
+        return None, build
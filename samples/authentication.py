@@ -0,0 +1,138 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+class TokenCache:
+    """
+    A bounded, thread-safe LRU of token key -> (user, token) with a TTL.
+    Optionally backed by a shared Django cache so several processes can
+    reuse each other's lookups. Each process invalidates its own entries on
+    token deletion and user changes; the TTL bounds how stale another
+    process's local entry can get.
+    """
+    def __init__(self, max_size=10000, ttl=60, shared_cache=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_cache_alias = shared_cache
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'TOKEN_AUTH_CACHE', {})
+        return cls(
+            max_size=options.get('MAX_SIZE', 10000),
+            ttl=options.get('TTL', 60),
+            shared_cache=options.get('SHARED_CACHE'),
+        )
+
+    @property
+    def shared_cache(self):
+        return caches[self.shared_cache_alias] if self.shared_cache_alias else None
+
+    def shared_key(self, key):
+        # Never use the raw token as a cache key.
+        return 'auth-token:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        cached = self.get_local(key)
+        if cached is not None:
+            return cached
+
+        if self.shared_cache is not None:
+            cached = self.shared_cache.get(self.shared_key(key))
+            if cached is not None:
+                self._store(key, *cached)
+                with self._lock:
+                    self.shared_hits += 1
+                return cached
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get_local(self, key):
+        """Look `key` up in this process only; never blocks on I/O."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, user, token = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return user, token
+                del self._entries[key]
+        return None
+
+    def is_known(self, key):
+        """True if `key` has a live entry in this process. Touches neither the stats nor the LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def set(self, key, user, token):
+        self._store(key, user, token)
+        if self.shared_cache is not None:
+            self.shared_cache.set(self.shared_key(key), (user, token), self.ttl)
+
+    def _store(self, key, user, token):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        if self.shared_cache is not None and keys:
+            self.shared_cache.delete_many([self.shared_key(key) for key in keys])
+
+    def invalidate_user(self, user_id, keys=()):
+        """Drop every entry for `user_id`, plus the given keys from the shared cache."""
+        with self._lock:
+            local_keys = [key for key, (_, user, _) in self._entries.items() if user.pk == user_id]
+        self.invalidate(*set(local_keys) | set(keys))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            }
+
+token_cache = TokenCache.from_settings()
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that caches the token and user lookup, so most
+    requests skip the Token/User query entirely.
+    """
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
@@ -0,0 +1,176 @@
+import json
+import statistics
+import subprocess
+import time
+import django
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from .loadtest import percentile
+from .models import AuditLog, Sample, Task
+
+# (name, method, path, body) for every route in samples/urls.py except the
+# event stream, which never ends. Paths and bodies are formatted with the
+# ids of one of the user's samples and tasks; writes are rolled back.
+ENDPOINTS = [
+    ('user', 'get', '/api/user/', None),
+    ('dashboard', 'get', '/api/dashboard/', None),
+    ('changes', 'get', '/api/changes/?since=0', None),
+    ('analytics-results', 'get', '/api/analytics/results/', None),
+    ('task-queue', 'get', '/api/tasks/queue/', None),
+    ('sample-list', 'get', '/api/samples/', None),
+    ('sample-list-full', 'get', '/api/samples/?expand=full', None),
+    ('sample-detail', 'get', '/api/samples/{sample}/', None),
+    ('sample-export', 'get', '/api/samples/export/', None),
+    ('sample-audit', 'get', '/api/samples/{sample}/audit/', None),
+    ('sample-search', 'get', '/api/samples/search/?q={search}', None),
+    ('sample-audit-export', 'get', '/api/samples/{sample}/audit/export/', None),
+    ('task-list', 'get', '/api/samples/{sample}/tasks/', None),
+    ('task-detail', 'get', '/api/samples/{sample}/tasks/{task}/', None),
+    ('sample-create', 'post', '/api/samples/', {'sample_id': 'BENCH-NEW', 'name': 'Benchmark'}),
+    ('sample-update', 'patch', '/api/samples/{sample}/', {'status': 'Analyzed'}),
+    ('sample-bulk', 'post', '/api/samples/bulk/', [
+        {'sample_id': f'BENCH-BULK-{index}', 'name': 'Benchmark', 'tasks': [{'name': 'QC'}]} for index in range(100)
+    ]),
+    ('sample-transition', 'post', '/api/samples/transition/', {'ids': ['{sample}'], 'status': 'Processing'}),
+    ('task-create', 'post', '/api/samples/{sample}/tasks/', {'name': 'Benchmark'}),
+    ('task-update', 'patch', '/api/samples/{sample}/tasks/{task}/', {'status': 'In Review'}),
+    ('task-transition', 'post', '/api/samples/{sample}/tasks/transition/', {'ids': ['{task}'], 'status': 'Completed'}),
+    ('register', 'post', '/api/register/', {'username': 'bench-new', 'email': 'bench@example.com', 'password': 'password'}),
+    ('login', 'post', '/api/login/', {'username': '{username}', 'password': '{password}'}),
+]
+
+def fill(value, context):
+    """Format the placeholders in a path or request body."""
+    if isinstance(value, str):
+        filled = value.format(**context)
+        return int(filled) if value.startswith('{') and filled.isdigit() else filled
+    if isinstance(value, list):
+        return [fill(item, context) for item in value]
+    if isinstance(value, dict):
+        return {key: fill(item, context) for key, item in value.items()}
+    return value
+
+class Benchmark:
+    """
+    Times the API in-process through the full middleware and auth stack,
+    with Django's test client, so the numbers track the code rather than a
+    web server. Each write runs in a transaction that is rolled back.
+    """
+    def __init__(self, user, password, iterations=50, warmup=5, compressed=False):
+        self.user = user
+        self.iterations = iterations
+        self.warmup = warmup
+        host = next((host for host in settings.ALLOWED_HOSTS if host and '*' not in host), 'localhost')
+        self.client = Client(HTTP_HOST=host.lstrip('.'))
+        self.headers = {'HTTP_AUTHORIZATION': f'Token {user.auth_token.key}'}
+        if compressed:
+            self.headers['HTTP_ACCEPT_ENCODING'] = 'gzip'
+        self.compressed = compressed
+        sample = Sample.objects.filter(owner=user, tasks__isnull=False).order_by('-created_at').first()
+        if sample is None:
+            sample = Sample.objects.filter(owner=user).order_by('-created_at').first()
+        task = Task.objects.filter(sample=sample).first() if sample else None
+        self.context = {
+            'sample': sample.pk if sample else '',
+            'task': task.pk if task else '',
+            # A sample_id prefix shared by up to a thousand samples.
+            'search': sample.sample_id[:-3] if sample else '',
+            'username': user.username,
+            'password': password,
+        }
+
+    def request(self, method, path, body):
+        kwargs = dict(self.headers)
+        if body is not None:
+            kwargs.update(data=json.dumps(body), content_type='application/json')
+        response = getattr(self.client, method)(path, **kwargs)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, len(content)
+
+    def call(self, method, path, body):
+        if method == 'get':
+            return self.request(method, path, body)
+        with transaction.atomic():
+            result = self.request(method, path, body)
+            transaction.set_rollback(True)
+        return result
+
+    def run_endpoint(self, name, method, path, body):
+        path, body = fill(path, self.context), fill(body, self.context)
+        for _ in range(self.warmup):
+            self.call(method, path, body)
+        # Count with a wrapper: the client's request_started signal resets connection.queries.
+        queries = []
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+        with connection.execute_wrapper(count):
+            status, size = self.call(method, path, body)
+
+        timings = []
+        started = time.perf_counter()
+        for _ in range(self.iterations):
+            request_started = time.perf_counter()
+            self.call(method, path, body)
+            timings.append(time.perf_counter() - request_started)
+        elapsed = time.perf_counter() - started
+        timings.sort()
+        return {
+            'name': name,
+            'method': method.upper(),
+            'path': path,
+            'status': status,
+            'iterations': self.iterations,
+            'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+            'p50_ms': round(percentile(timings, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+            'requests_per_second': round(self.iterations / elapsed, 1) if elapsed else None,
+            'queries': len(queries),
+            'bytes': size,
+        }
+
+    def run(self, names=None):
+        endpoints = [endpoint for endpoint in ENDPOINTS if not names or endpoint[0] in names]
+        # Every iteration uses the same token, so the throttles would answer most of them.
+        with override_settings(THROTTLE={**settings.THROTTLE, 'ENABLED': False}):
+            results = [self.run_endpoint(*endpoint) for endpoint in endpoints]
+        return {
+            'meta': self.meta(),
+            'endpoints': results,
+        }
+
+    def meta(self):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': self.iterations,
+            'compressed': self.compressed,
+            'user': self.user.username,
+            'dataset': {
+                'samples': Sample.objects.filter(owner=self.user).count(),
+                'tasks': Task.objects.filter(sample__owner=self.user).count(),
+                'audit_logs': AuditLog.objects.filter(sample__owner=self.user).count(),
+            },
+        }
+
+def compare(baseline, current):
+    """Per-endpoint changes from a previous run's results: `(name, p50 change %, query change)`."""
+    previous = {endpoint['name']: endpoint for endpoint in baseline['endpoints']}
+    rows = []
+    for endpoint in current['endpoints']:
+        before = previous.get(endpoint['name'])
+        if before is None:
+            continue
+        change = (endpoint['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+        rows.append((endpoint['name'], round(change, 1), endpoint['queries'] - before['queries']))
+    return rows
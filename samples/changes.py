@@ -0,0 +1,85 @@
+from itertools import chain
+from operator import attrgetter
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .archive import audit_tiers
+from .models import ChangeEvent, ChangeKind, Sample, Task
+
+PAGE_SIZE = 500
+
+def record_changes(owner_id, kind, object_ids, deleted=False):
+    """
+    Append change events for `object_ids`. Call inside the transaction that
+    makes the change so the feed never reports uncommitted rows.
+
+    Event ids are the feed's cursor, so one owner's events must commit in id
+    order: the owner's user row is locked first, which holds back any other
+    transaction recording changes for that owner until this one commits, so
+    its events always get the later ids. SQLite needs no lock: it runs one
+    write transaction at a time.
+    """
+    if owner_id is None:
+        return
+    now = timezone.now()
+    using = router.db_for_write(ChangeEvent)
+    with transaction.atomic(using=using, savepoint=False):
+        if connections[using].features.has_select_for_update:
+            # FOR NO KEY UPDATE: rows referencing the user can still be inserted meanwhile.
+            list(User.objects.using(using).select_for_update(no_key=True).filter(pk=owner_id).values_list('pk'))
+        ChangeEvent.objects.using(using).bulk_create([
+            ChangeEvent(owner_id=owner_id, kind=kind, object_id=object_id, deleted=deleted, timestamp=now)
+            for object_id in object_ids
+        ])
+
+def parse_cursor(value):
+    if value in (None, ''):
+        return 0
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        cursor = -1
+    if cursor < 0:
+        raise ValidationError({'since': ['Must be a cursor returned by a previous call, or 0.']})
+    return cursor
+
+def changes_since(user, cursor, page_size=PAGE_SIZE):
+    """
+    Collapse the user's events after `cursor` into the current state of each
+    changed row and the ids of deleted ones. Returns
+    `(next_cursor, has_more, samples, tasks, audit_logs, deleted)`.
+    """
+    events = list(
+        ChangeEvent.objects.filter(owner=user, id__gt=cursor)
+        .order_by('id')
+        .values_list('id', 'kind', 'object_id', 'deleted')[:page_size + 1]
+    )
+    has_more = len(events) > page_size
+    events = events[:page_size]
+    next_cursor = events[-1][0] if events else cursor
+
+    # Only the latest event per row matters.
+    latest = {}
+    for _, kind, object_id, deleted in events:
+        latest[(kind, object_id)] = deleted
+    changed = {kind: [] for kind in ChangeKind.values}
+    deleted = {kind: [] for kind in ChangeKind.values}
+    for (kind, object_id), is_deleted in latest.items():
+        (deleted if is_deleted else changed)[kind].append(object_id)
+
+    # A row may be gone even if its delete event is past this page; it is
+    # simply skipped here and reported as deleted on a later page.
+    samples = Sample.objects.filter(owner=user, pk__in=changed[ChangeKind.SAMPLE]).select_related('owner').order_by('pk')
+    tasks = Task.objects.filter(
+        sample__owner=user, pk__in=changed[ChangeKind.TASK]
+    ).select_related('sample', 'analyst').order_by('pk')
+    # Logs may have been archived since their event was recorded.
+    audit_logs = sorted(
+        chain.from_iterable(
+            queryset.filter(pk__in=changed[ChangeKind.AUDIT_LOG]).select_related('actor')
+            for queryset in audit_tiers(user)
+        ),
+        key=attrgetter('pk'),
+    )
+    return next_cursor, has_more, samples, tasks, audit_logs, deleted
@@ -0,0 +1,58 @@
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource has changed since the version in If-Match. Fetch it again and retry.'
+    default_code = 'precondition_failed'
+
+class VersionConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The resource was changed by another request at the same time. Please retry.'
+    default_code = 'conflict'
+
+def tag_version(tag):
+    """The version an entity tag names, or None: `"3"`, or the detail ETag `W/"3.<hash>"`."""
+    if tag.startswith('W/'):
+        tag = tag[2:]
+    version = tag[1:-1].split('.', 1)[0]
+    return int(version) if version.isdigit() else None
+
+def if_match_versions(request):
+    """
+    The versions listed in the If-Match header, as a set of ints, or None
+    without the header or with `*`. Clients send back the ETag of the
+    sample or task they read, or its `version` field as `If-Match: "3"`.
+    The ETag is weak (GZip weakens strong ones anyway), so weak tags are
+    accepted; only the version in them is compared.
+    """
+    header = request.headers.get('If-Match')
+    if header is None:
+        return None
+    tags = parse_etags(header)
+    if tags == ['*']:
+        return None
+    return {version for version in map(tag_version, tags) if version is not None}
+
+def save_versioned(serializer, request):
+    """
+    serializer.save() for an update of a VersionedModel, without a row lock.
+    The validated data is written only while the row is still at the
+    version the view read, so whatever the caller derived from the old
+    values (audit logs, summary deltas) belongs to the winning write only.
+
+    Raises PreconditionFailed (412) when If-Match does not name the current
+    version or the row changed after it was checked, and VersionConflict
+    (409) when a request without If-Match loses a race.
+    """
+    instance = serializer.instance
+    expected = instance.version
+    versions = if_match_versions(request)
+    if versions is not None and expected not in versions:
+        raise PreconditionFailed()
+    for attr, value in serializer.validated_data.items():
+        setattr(instance, attr, value)
+    if not instance.save_if_version(expected):
+        raise VersionConflict() if versions is None else PreconditionFailed()
+    return instance
@@ -0,0 +1,86 @@
+import hashlib
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+def make_etag(request, user, last_modified, extra, version=None):
+    """
+    A weak ETag over the request and validators. With a `version` (of a
+    single sample or task) the tag starts with it, `W/"<version>.<hash>"`,
+    so clients can send it back in If-Match (see samples.concurrency).
+    """
+    key = '|'.join([
+        str(user.pk),
+        request.get_full_path(),
+        request.headers.get('Accept', ''),
+        last_modified.isoformat() if last_modified else '',
+        str(extra),
+    ])
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    if version is not None:
+        digest = f'{version}.{digest}'
+    return quote_etag('W/"%s"' % digest)
+
+def etag_only(validators):
+    """
+    `(updated_at, extra[, version])` as validators that send no Last-Modified.
+    Last-Modified has one-second precision (and a newest updated_at does not
+    move on deletes), so If-Modified-Since could get a stale 304; the ETag
+    covers updated_at to the microsecond. None stays None.
+    """
+    if validators is None:
+        return None
+    updated_at, extra, *version = validators
+    return (None, (updated_at, extra), *version)
+
+def check_conditional(request, user, validators):
+    """
+    Returns `(not_modified, headers)`: a 304 response when the client's copy
+    is current (else None), and the ETag / Last-Modified headers to set on a
+    200 response. `validators` is `(last_modified, extra)`, `(last_modified,
+    extra, version)` for a single versioned row, or None.
+    """
+    if validators is None:
+        return None, {}
+    last_modified, extra, *version = validators
+    etag = make_etag(request, user, last_modified, extra, *version)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        return not_modified, {}
+    headers = {'ETag': etag}
+    if timestamp is not None:
+        headers['Last-Modified'] = http_date(timestamp)
+    return None, headers
+
+class ConditionalGetMixin:
+    """
+    Answers If-None-Match / If-Modified-Since on list and retrieve with a 304
+    before the queryset is serialized, and sets ETag / Last-Modified otherwise.
+
+    Views implement `get_conditional_validators()`, returning
+    `(last_modified, extra)` from one cheap query, or None to skip the check.
+    The API's views pass theirs through etag_only(), so only the ETag decides.
+    `extra` is anything else that changes when the data does (e.g. a row count).
+    Retrieve of a versioned row adds its version as a third item.
+    """
+    def get_conditional_validators(self):
+        return None
+
+    def conditional(self, handler, request, *args, **kwargs):
+        validators = self.get_conditional_validators()
+        not_modified, headers = check_conditional(request._request, request.user, validators)
+        if not_modified is not None:
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            for header, value in headers.items():
+                response[header] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+
+class Subscription:
+    """One listener's queue of events, bound to the event loop that reads it."""
+    def __init__(self, user_id, max_size):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_size)
+        # Set when events had to be dropped; the client should resync from /api/changes/.
+        self.overflowed = False
+
+    def offer(self, events):
+        for event in events:
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.overflowed = True
+                return
+
+class InProcessBroker:
+    """
+    Fans events out to the subscribers of one process.
+    publish() may be called from any thread; delivery is handed to each
+    subscriber's event loop. For several nodes, point EVENT_BROKER at a
+    class with the same subscribe/unsubscribe/publish methods that relays
+    through a shared bus.
+    """
+    def __init__(self, max_queue_size=1000):
+        self.max_queue_size = max_queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """Must be called from the event loop that will read the subscription."""
+        subscription = Subscription(user_id, self.max_queue_size)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id, events):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, events)
+            except RuntimeError:
+                # The subscriber's loop has closed.
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, 'EVENT_BROKER', 'samples.events.InProcessBroker'))()
+
+def publish(owner_id, events):
+    """Push events to the owner's listeners once the current transaction commits."""
+    if owner_id is None or not events:
+        return
+    events = list(events)
+    transaction.on_commit(lambda: get_broker().publish(owner_id, events))
+
+def sample_status_event(sample_pk, old_status, new_status):
+    return {'type': 'sample.status', 'sample': sample_pk, 'from': old_status, 'to': new_status}
+
+def task_status_event(task_pk, sample_pk, old_status, new_status):
+    return {'type': 'task.status', 'task': task_pk, 'sample': sample_pk, 'from': old_status, 'to': new_status}
+
+def audit_log_event(log, actor):
+    return {
+        'type': 'audit_log',
+        'id': log.pk,
+        'sample': log.sample_id,
+        'actor_username': actor.username if actor else None,
+        'action': log.action,
+        'timestamp': log.timestamp,
+    }
+
+def format_sse(event):
+    """Encode one event as a server-sent events message."""
+    data = json.dumps(event, cls=JSONEncoder, separators=(',', ':'))
+    return f"event: {event['type']}\ndata: {data}\n\n"
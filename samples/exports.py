@@ -0,0 +1,130 @@
+import csv
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from .archive import audit_tiers
+from .models import Sample, SampleStatus
+
+# Rows are pulled from a server-side cursor in chunks of this size.
+EXPORT_CHUNK_SIZE = 2000
+
+# (column name, values() lookup) pairs for each export.
+SAMPLE_COLUMNS = [
+    ('sample_pk', 'id'),
+    ('sample_id', 'sample_id'),
+    ('sample_name', 'name'),
+    ('sample_status', 'status'),
+    ('sample_created_at', 'created_at'),
+    ('sample_updated_at', 'updated_at'),
+    ('task_id', 'tasks__id'),
+    ('task_name', 'tasks__name'),
+    ('task_status', 'tasks__status'),
+    ('task_priority', 'tasks__priority'),
+    ('task_due_date', 'tasks__due_date'),
+    ('task_analyst', 'tasks__analyst__username'),
+    ('task_result_text', 'tasks__result_text'),
+    ('task_result_numeric', 'tasks__result_numeric'),
+    ('task_updated_at', 'tasks__updated_at'),
+]
+
+AUDIT_COLUMNS = [
+    ('id', 'id'),
+    ('sample_pk', 'sample_id'),
+    ('sample_id', 'sample__sample_id'),
+    ('actor', 'actor__username'),
+    ('action', 'action'),
+    ('timestamp', 'timestamp'),
+]
+
+class Echo:
+    """A file-like object whose write() hands the line back to the caller."""
+    def write(self, value):
+        return value
+
+def parse_bound(params, name, end=False):
+    """
+    Parse a date or datetime query parameter into an aware datetime.
+    A bare date used as an upper bound covers that whole day.
+    """
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        # Dates first: parse_datetime() also reads a bare date, as midnight.
+        day = parse_date(value)
+        if day is not None:
+            parsed = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+        else:
+            parsed = parse_datetime(value)
+    except ValueError:
+        # Well formed but not a real date or time, such as a 13th month.
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: ['Use YYYY-MM-DD or an ISO 8601 datetime.']})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+def filter_range(queryset, params, field):
+    """Apply the `from`/`to` query parameters to a datetime field."""
+    start = parse_bound(params, 'from')
+    end = parse_bound(params, 'to', end=True)
+    if start:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    if end:
+        queryset = queryset.filter(**{f'{field}__lt': end})
+    return queryset
+
+def sample_export_rows(user, params):
+    queryset = Sample.objects.filter(owner=user)
+    if params.get('status'):
+        if params['status'] not in SampleStatus.values:
+            raise ValidationError({'status': [f'"{params["status"]}" is not a valid choice.']})
+        queryset = queryset.filter(status=params['status'])
+    queryset = filter_range(queryset, params, 'created_at')
+    return queryset.order_by('created_at', 'id', 'tasks__id').values_list(
+        *[lookup for _, lookup in SAMPLE_COLUMNS]
+    )
+
+def audit_export_rows(user, params, sample_pk=None):
+    # Recent and archived logs, so the export is always the full history.
+    recent, archived = (
+        filter_range(queryset, params, 'timestamp').values_list(*[lookup for _, lookup in AUDIT_COLUMNS])
+        for queryset in audit_tiers(user, sample_pk)
+    )
+    return recent.union(archived, all=True).order_by('timestamp', 'id')
+
+def format_value(value):
+    """Format a value the way the JSON API renders it (ISO 8601 with 'Z', decimals as strings)."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    if isinstance(value, (date, Decimal)):
+        return str(value)
+    return value
+
+def stream_csv(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield writer.writerow(['' if value is None else format_value(value) for value in row])
+
+def stream_ndjson(columns, rows):
+    names = [name for name, _ in columns]
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield json.dumps(dict(zip(names, map(format_value, row)))) + '\n'
+
+def export_response(export_format, columns, rows, filename):
+    """Build a streaming response; `rows` is only evaluated as the body is sent."""
+    if export_format == 'ndjson':
+        response = StreamingHttpResponse(stream_ndjson(columns, rows), content_type='application/x-ndjson')
+        filename = f'{filename}.ndjson'
+    else:
+        response = StreamingHttpResponse(stream_csv(columns, rows), content_type='text/csv')
+        filename = f'{filename}.csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
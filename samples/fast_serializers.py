@@ -0,0 +1,150 @@
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import BasePermission
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from .metrics import serializing
+
+# Fields whose to_representation returns database values unchanged.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+)
+
+class ValuesSerializer:
+    """
+    A read-only stand-in for a DRF serializer that builds the same output
+    from values() rows instead of model instances.
+
+    The serializer's fields are compiled once into (name, column, mapper,
+    parents) tuples: the column to select, with `owner.username` style
+    sources turned into joins, the field's own to_representation, or nothing
+    for fields that pass database values through unchanged, and the foreign
+    keys the source goes through. Like DRF, a field whose source goes through
+    a null relation is left out, unless it has allow_null. Nested
+    `many=True` serializers are loaded with one extra query each.
+    Serializers with other kinds of fields raise ImproperlyConfigured.
+    """
+    def __init__(self, serializer):
+        model = serializer.Meta.model
+        self.columns = []
+        self.nested = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                relation = model._meta.get_field(field.source)
+                if not relation.one_to_many:
+                    raise ImproperlyConfigured(f"{name}: only reverse foreign keys can be nested.")
+                self.nested.append((name, relation.field.attname, ValuesSerializer(field.child)))
+                continue
+            column = '__'.join(field.source_attrs)
+            # DRF skips the field when getattr() on a null relation fails.
+            parents = []
+            if len(field.source_attrs) > 1 and not field.allow_null:
+                if field.default is not serializers.empty:
+                    raise ImproperlyConfigured(f"{name}: defaults on related sources are not supported.")
+                parents = ['__'.join(field.source_attrs[:depth]) for depth in range(1, len(field.source_attrs))]
+            if isinstance(field, PrimaryKeyRelatedField):
+                if field.pk_field is not None:
+                    raise ImproperlyConfigured(f"{name}: pk_field is not supported.")
+                mapper = None
+            elif isinstance(field, PASSTHROUGH_FIELDS):
+                mapper = None
+            elif isinstance(field, (serializers.DateTimeField, serializers.DateField, serializers.DecimalField)):
+                mapper = field.to_representation
+            else:
+                raise ImproperlyConfigured(f"{name}: {type(field).__name__} is not supported.")
+            self.columns.append((name, column, mapper, parents))
+        self.model = model
+        self.column_names = list(dict.fromkeys(
+            name for _, column, _, parents in self.columns for name in (*parents, column)
+        ))
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def for_serializer(cls, serializer_class):
+        """The compiled form of `serializer_class`, or None if it cannot be compiled."""
+        try:
+            return cls(serializer_class())
+        except (AttributeError, ImproperlyConfigured):
+            return None
+
+    def values(self, queryset, *extra):
+        """The rows to serialize: `queryset` reduced to the compiled columns (plus `extra`)."""
+        return queryset.prefetch_related(None).values('pk', *self.column_names, *extra)
+
+    def to_representation(self, row):
+        result = {}
+        for name, column, mapper, parents in self.columns:
+            if any(row[parent] is None for parent in parents):
+                continue
+            value = row[column]
+            result[name] = value if mapper is None or value is None else mapper(value)
+        return result
+
+    def serialize(self, rows):
+        """
+        Serialize a list of rows from values(), loading nested lists for all
+        of them at once. Timed as serializer time, like Serializer.data.
+        """
+        with serializing():
+            return self._serialize(rows)
+
+    def _serialize(self, rows):
+        results = [self.to_representation(row) for row in rows]
+        for name, foreign_key, child in self.nested:
+            children = {result_row['pk']: [] for result_row in rows}
+            child_rows = child.values(child.model.objects.filter(**{f'{foreign_key}__in': list(children)}), foreign_key)
+            for child_row in child_rows:
+                children[child_row[foreign_key]].append(child.to_representation(child_row))
+            for row, result in zip(rows, results):
+                result[name] = children[row['pk']]
+        return results
+
+class FastReadMixin:
+    """
+    Serves list and retrieve through ValuesSerializer when the view's
+    serializer class can be compiled, skipping model instances and DRF's
+    per-field machinery. The output is the same as the serializer's. Writes,
+    reads of serializers that cannot be compiled and views with object-level
+    permissions use the serializer as usual. Set FAST_READ_SERIALIZERS =
+    False to turn it off.
+    """
+    def get_values_serializer(self):
+        if not getattr(settings, 'FAST_READ_SERIALIZERS', True):
+            return None
+        if any(
+            type(permission).has_object_permission is not BasePermission.has_object_permission
+            for permission in self.get_permissions()
+        ):
+            return None
+        return ValuesSerializer.for_serializer(self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        values_serializer = self.get_values_serializer()
+        if values_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = values_serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.serialize(page))
+        return Response(values_serializer.serialize(list(rows)))
+
+    def retrieve(self, request, *args, **kwargs):
+        values_serializer = self.get_values_serializer()
+        if values_serializer is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            values_serializer.values(self.filter_queryset(self.get_queryset())),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        return Response(values_serializer.serialize([row])[0])
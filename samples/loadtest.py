@@ -0,0 +1,67 @@
+import http.client
+import itertools
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of `values` (already sorted)."""
+    if not values:
+        return None
+    return values[min(int(round(fraction * (len(values) - 1))), len(values) - 1)]
+
+def run_load(url, total, concurrency, headers=None):
+    """
+    Send `total` GETs to `url` from `concurrency` threads, each holding one
+    keep-alive connection, and return throughput and latency figures.
+    The client is plain Python, so keep an eye on its own CPU use when
+    pushing the concurrency up.
+    """
+    parts = urlsplit(url)
+    target = parts.path + (f'?{parts.query}' if parts.query else '')
+    tickets = itertools.count()
+    lock = threading.Lock()
+
+    def worker():
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        latencies, statuses, size = [], Counter(), 0
+        while True:
+            with lock:
+                if next(tickets) >= total:
+                    break
+            started = time.perf_counter()
+            try:
+                connection.request('GET', target, headers=headers or {})
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+                statuses['error'] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status] += 1
+            size += len(body)
+        connection.close()
+        return latencies, statuses, size
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda _: worker(), range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    statuses = sum((result[1] for result in results), Counter())
+    return {
+        'requests': total,
+        'concurrency': concurrency,
+        'statuses': {str(code): count for code, count in sorted(statuses.items(), key=str)},
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        'bytes': sum(result[2] for result in results),
+    }
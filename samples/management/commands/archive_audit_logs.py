@@ -0,0 +1,37 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from samples.archive import archivable, archive_batch
+
+class Command(BaseCommand):
+    help = (
+        "Moves audit logs older than the retention window from AuditLog to ArchivedAuditLog in "
+        "batches, keeping each sample's latest entry. Archived logs are still served by "
+        "/api/samples/<id>/audit/, the audit export and the change feed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=settings.AUDIT_LOG_HOT_DAYS,
+            help="Archive logs older than this many days (default: AUDIT_LOG_HOT_DAYS)."
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help="Logs moved per transaction.")
+        parser.add_argument('--max-batches', type=int, help="Stop after this many batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the logs that would be archived.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        if options['dry_run']:
+            self.stdout.write(f"{archivable(cutoff).count()} audit logs older than {cutoff:%Y-%m-%d} would be archived.")
+            return
+
+        moved = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            count = archive_batch(cutoff, options['batch_size'])
+            if not count:
+                break
+            moved += count
+            batches += 1
+            self.stdout.write(f"Archived {moved} audit logs.")
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} audit logs older than {cutoff:%Y-%m-%d}."))
@@ -0,0 +1,61 @@
+import json
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.authtoken.models import Token
+from samples.benchmarks import ENDPOINTS, Benchmark, compare
+
+class Command(BaseCommand):
+    help = (
+        "Measures latency percentiles, throughput, query counts and response bytes for each API "
+        "endpoint in-process, against the configured database. Generate data first with "
+        "generate_lab_data; write --output files to compare runs between commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help="User to benchmark as (defaults to the user with the most samples).")
+        parser.add_argument('--password', default='password', help="The user's password, for the login endpoint.")
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--endpoint', action='append', dest='endpoints', choices=[endpoint[0] for endpoint in ENDPOINTS],
+            help="Only run these endpoints; repeatable."
+        )
+        parser.add_argument('--gzip', action='store_true', help="Send Accept-Encoding: gzip, so bytes are as sent on the wire.")
+        parser.add_argument('--output', help="Write the results as JSON to this file.")
+        parser.add_argument('--compare', help="A previous --output file to compare against.")
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['username']:
+            user = users.filter(username=options['username']).first()
+        else:
+            user = users.alias(sample_count=Count('samples')).order_by('-sample_count', 'pk').first()
+        if user is None:
+            raise CommandError("No matching user found; run generate_lab_data first.")
+        Token.objects.get_or_create(user=user)
+
+        results = Benchmark(
+            user, options['password'], options['iterations'], options['warmup'], options['gzip']
+        ).run(options['endpoints'])
+
+        self.stdout.write(
+            f"{'endpoint':<22} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'queries':>7} {'bytes':>10}"
+        )
+        for row in results['endpoints']:
+            self.stdout.write(
+                f"{row['name']:<22} {row['status']:>6} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} "
+                f"{row['requests_per_second']:>8} {row['queries']:>7} {row['bytes']:>10}"
+            )
+
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Compared with {baseline['meta'].get('commit') or options['compare']}:"))
+            for name, change, queries in compare(baseline, results):
+                self.stdout.write(f"{name:<22} p50 {change:+.1f}%  queries {queries:+d}")
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}."))
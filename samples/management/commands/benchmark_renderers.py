@@ -0,0 +1,86 @@
+import gzip
+import json
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from samples.fast_serializers import ValuesSerializer
+from samples.models import Sample, Task
+from samples.renderers import FastJSONRenderer, orjson
+from samples.serializers import SampleListSerializer, SampleSerializer, TaskSerializer
+from samples.views import with_list_annotations
+
+class Command(BaseCommand):
+    help = (
+        "Compares DRF's JSONRenderer with FastJSONRenderer on large lists: render time, whether "
+        "the bytes are identical, and the body size before and after gzip."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help="User whose rows to render (defaults to the user with the most samples).")
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5, help="Best of this many runs is reported.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['username']:
+            user = users.filter(username=options['username']).first()
+        else:
+            user = users.alias(sample_count=Count('samples')).order_by('-sample_count', 'pk').first()
+        if user is None:
+            raise CommandError("No matching user found; run generate_lab_data first.")
+        if orjson is None:
+            self.stderr.write("orjson is not installed; FastJSONRenderer falls back to JSONRenderer.")
+
+        rows = options['rows']
+        samples = Sample.objects.filter(owner=user).order_by('-created_at', '-id')
+        cases = [
+            ('sample-list', SampleListSerializer, with_list_annotations(samples)[:rows]),
+            ('sample-full', SampleSerializer, samples[:rows]),
+            ('task-list', TaskSerializer, Task.objects.filter(sample__owner=user).order_by('id')[:rows]),
+        ]
+
+        results = []
+        for name, serializer_class, queryset in cases:
+            values_serializer = ValuesSerializer.for_serializer(serializer_class)
+            data = values_serializer.serialize(list(values_serializer.values(queryset)))
+            drf_seconds, drf_body = self.best_of(options['repeat'], lambda: JSONRenderer().render(data))
+            fast_seconds, fast_body = self.best_of(options['repeat'], lambda: FastJSONRenderer().render(data))
+            gzip_seconds, compressed = self.best_of(options['repeat'], lambda: gzip.compress(fast_body, compresslevel=6))
+            results.append({
+                'name': name,
+                'rows': len(data),
+                'drf_ms': round(drf_seconds * 1000, 1),
+                'fast_ms': round(fast_seconds * 1000, 1),
+                'speedup': round(drf_seconds / fast_seconds, 2) if fast_seconds else None,
+                'identical': drf_body == fast_body,
+                'bytes': len(fast_body),
+                'gzip_bytes': len(compressed),
+                'gzip_ms': round(gzip_seconds * 1000, 1),
+            })
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'case':<12} {'rows':>7} {'drf ms':>8} {'fast ms':>8} {'speedup':>8} {'bytes':>11} "
+            f"{'gzip bytes':>11} {'gzip ms':>8}  identical"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['name']:<12} {result['rows']:>7} {result['drf_ms']:>8} {result['fast_ms']:>8} "
+                f"{result['speedup']:>7}x {result['bytes']:>11} {result['gzip_bytes']:>11} {result['gzip_ms']:>8}  "
+                f"{result['identical']}"
+            )
+
+    def best_of(self, repeat, run):
+        best = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            output = run()
+            elapsed = time.perf_counter() - started
+            if best is None or elapsed < best:
+                best = elapsed
+        return best, output
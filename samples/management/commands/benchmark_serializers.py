@@ -0,0 +1,85 @@
+import json
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Prefetch
+from rest_framework.renderers import JSONRenderer
+from samples.fast_serializers import ValuesSerializer
+from samples.models import AuditLog, Sample, Task
+from samples.serializers import SampleListSerializer, SampleSerializer, TaskSerializer
+from samples.views import with_list_annotations
+
+class Command(BaseCommand):
+    help = (
+        "Compares the DRF serializers with the values() fast path on large lists: query plus "
+        "serialization time, rows per second, and whether the rendered JSON is identical."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help="User whose rows to serialize (defaults to the user with the most samples).")
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3, help="Best of this many runs is reported.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['username']:
+            user = users.filter(username=options['username']).first()
+        else:
+            user = users.alias(sample_count=Count('samples')).order_by('-sample_count', 'pk').first()
+        if user is None:
+            raise CommandError("No matching user found; run generate_lab_data first.")
+
+        rows = options['rows']
+        samples = Sample.objects.filter(owner=user).select_related('owner').order_by('-created_at', '-id')
+        tasks = Task.objects.filter(sample__owner=user).select_related('analyst').order_by('id')
+        cases = [
+            ('sample-list', SampleListSerializer, with_list_annotations(samples)[:rows]),
+            ('sample-full', SampleSerializer, samples.prefetch_related(
+                Prefetch('tasks', queryset=Task.objects.select_related('analyst')),
+                Prefetch('audit_logs', queryset=AuditLog.objects.select_related('actor')),
+            )[:rows]),
+            ('task-list', TaskSerializer, tasks[:rows]),
+        ]
+
+        results = []
+        renderer = JSONRenderer()
+        for name, serializer_class, queryset in cases:
+            values_serializer = ValuesSerializer.for_serializer(serializer_class)
+            drf_seconds, drf_output = self.best_of(
+                options['repeat'], lambda: serializer_class(queryset.all(), many=True).data
+            )
+            fast_seconds, fast_output = self.best_of(
+                options['repeat'], lambda: values_serializer.serialize(list(values_serializer.values(queryset.all())))
+            )
+            count = len(drf_output)
+            results.append({
+                'name': name,
+                'rows': count,
+                'drf_ms': round(drf_seconds * 1000, 1),
+                'fast_ms': round(fast_seconds * 1000, 1),
+                'drf_rows_per_second': round(count / drf_seconds) if drf_seconds else None,
+                'fast_rows_per_second': round(count / fast_seconds) if fast_seconds else None,
+                'speedup': round(drf_seconds / fast_seconds, 2) if fast_seconds else None,
+                'identical': renderer.render(drf_output) == renderer.render(fast_output),
+            })
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'case':<12} {'rows':>7} {'drf ms':>9} {'fast ms':>9} {'speedup':>8}  identical")
+        for result in results:
+            self.stdout.write(
+                f"{result['name']:<12} {result['rows']:>7} {result['drf_ms']:>9} {result['fast_ms']:>9} "
+                f"{result['speedup']:>7}x  {result['identical']}"
+            )
+
+    def best_of(self, repeat, run):
+        best = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            output = run()
+            elapsed = time.perf_counter() - started
+            if best is None or elapsed < best:
+                best = elapsed
+        return best, output
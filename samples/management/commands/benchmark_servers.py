@@ -0,0 +1,87 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+from samples.loadtest import run_load
+
+SERVERS = {
+    'wsgi': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', 'laboratory_sample_tracker.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+    ],
+    'asgi': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'laboratory_sample_tracker.asgi:application',
+        '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers), '--no-access-log',
+    ],
+}
+
+class Command(BaseCommand):
+    help = (
+        "Starts the app under gunicorn (WSGI) and uvicorn (ASGI) in turn with the same number of "
+        "workers, and compares requests/sec and latency percentiles on the read endpoints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help="User to authenticate as (defaults to the first user).")
+        parser.add_argument('--path', action='append', dest='paths', help="Endpoint to load; repeatable. Defaults to /api/samples/ and /api/user/.")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per endpoint and server.")
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--workers', type=int, default=2, help="Server worker processes.")
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--server', choices=sorted(SERVERS), action='append', dest='servers', help="Only run these servers.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+        else:
+            user = User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError("No matching user found; create some data first.")
+        token, _ = Token.objects.get_or_create(user=user)
+        headers = {'Authorization': f'Token {token.key}', 'Accept': 'application/json'}
+        paths = options['paths'] or ['/api/samples/', '/api/user/']
+
+        results = []
+        for name in options['servers'] or ['wsgi', 'asgi']:
+            command = SERVERS[name](options['port'], options['workers'])
+            environment = {**os.environ, 'SERVER_MODE': name, 'THROTTLE_ENABLED': 'False'}
+            server = subprocess.Popen(command, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                self.wait_for_port(options['port'], server)
+                for path in paths:
+                    url = f"http://127.0.0.1:{options['port']}{path}"
+                    # Warm up connections and per-process caches first.
+                    run_load(url, options['concurrency'] * 2, options['concurrency'], headers)
+                    result = run_load(url, options['requests'], options['concurrency'], headers)
+                    results.append({'server': name, 'path': path, **result})
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'server':<6} {'path':<28} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+        for result in results:
+            self.stdout.write(
+                f"{result['server']:<6} {result['path']:<28} {result['requests_per_second']:>9} "
+                f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8}  {result['statuses']}"
+            )
+
+    def wait_for_port(self, port, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"The server exited with status {server.returncode}; is it installed?")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"The server did not start listening on port {port}.")
@@ -0,0 +1,60 @@
+from datetime import date
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import HttpRequest
+from rest_framework.request import Request
+from samples.models import AuditLog, Sample, Task, TaskStatus
+from samples.pagination import SampleCursorPagination
+from samples.views import SampleViewSet, TaskViewSet
+
+class Command(BaseCommand):
+    help = "Prints the database EXPLAIN plan for the main API queries of one user."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help="User whose data the queries are scoped to (defaults to the first user).")
+        parser.add_argument('--analyze', action='store_true', help="Run EXPLAIN ANALYZE (PostgreSQL only).")
+
+    def handle(self, *args, **options):
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+        else:
+            user = User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError("No matching user found.")
+
+        self.explain_options = {}
+        if options['analyze']:
+            if connection.vendor != 'postgresql':
+                raise CommandError("--analyze is only supported on PostgreSQL.")
+            self.explain_options = {'analyze': True, 'buffers': True}
+
+        for title, queryset in self.get_querysets(user):
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(queryset.explain(**self.explain_options))
+            self.stdout.write('')
+
+    def get_view(self, viewset_class, user, action, **kwargs):
+        """Builds a viewset the way the router would, so we explain the real querysets."""
+        request = Request(HttpRequest())
+        request.user = user
+        view = viewset_class(request=request, action=action, kwargs=kwargs, format_kwarg=None)
+        return view
+
+    def get_querysets(self, user):
+        sample_list = self.get_view(SampleViewSet, user, 'list').get_queryset()
+        yield "Sample list (first page)", sample_list.order_by(*SampleCursorPagination.ordering)[:SampleCursorPagination.page_size]
+
+        sample = Sample.objects.filter(owner=user).order_by('-created_at').first()
+        if sample is None:
+            self.stdout.write(self.style.WARNING(f"{user.username} has no samples; skipping per-sample queries."))
+        else:
+            detail = self.get_view(SampleViewSet, user, 'retrieve', pk=sample.pk).get_queryset()
+            yield "Sample retrieve", detail.filter(pk=sample.pk)
+            yield "Sample tasks (prefetch)", Task.objects.filter(sample=sample).select_related('analyst')
+            yield "Sample audit logs (prefetch)", AuditLog.objects.filter(sample=sample).select_related('actor').order_by('timestamp')
+            yield "Task list", self.get_view(TaskViewSet, user, 'list', sample_pk=sample.pk).get_queryset()
+
+        open_tasks = Task.objects.exclude(status=TaskStatus.COMPLETED)
+        yield "Analyst backlog", open_tasks.filter(analyst=user).order_by('due_date')
+        yield "Overdue tasks", open_tasks.filter(due_date__lt=date.today()).order_by('due_date', 'priority')
@@ -0,0 +1,125 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from samples.changes import record_changes
+from samples.models import AuditLog, ChangeKind, Sample, SampleStatus, Task, TaskPriority, TaskStatus
+from samples.search import reindex
+from samples.summary import rebuild
+
+TASK_NAMES = ['Extraction', 'Purification', 'PCR', 'Sequencing', 'QC', 'Mass spec', 'Titration', 'Assay']
+
+class Command(BaseCommand):
+    help = (
+        "Generates synthetic labs for load testing: users with tokens, and samples with tasks and "
+        "audit history spread over the past months. Derived tables (change feed, dashboard "
+        "summaries) are filled in as the API would."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5)
+        parser.add_argument('--samples', type=int, default=200, help="Samples per user.")
+        parser.add_argument('--tasks', type=int, default=3, help="Tasks per sample.")
+        parser.add_argument('--audit', type=int, default=3, help="Audit log entries per sample.")
+        parser.add_argument('--days', type=int, default=180, help="Spread creation times over this many days.")
+        parser.add_argument('--prefix', default='lab', help="Prefix for usernames and sample ids.")
+        parser.add_argument('--password', default='password', help="Password of the generated users.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        prefix = options['prefix']
+        usernames = [f'{prefix}-user-{index}' for index in range(options['users'])]
+        if User.objects.filter(username__in=usernames).exists():
+            raise CommandError(f"Users with the prefix '{prefix}' already exist; pick another --prefix.")
+
+        password = make_password(options['password'])
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(username=username, email=f'{username}@example.com', password=password)
+                for username in usernames
+            ])
+            # bulk_create skips the signal that gives each user a token.
+            Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users])
+
+        now = timezone.now()
+        totals = {'samples': 0, 'tasks': 0, 'audit_logs': 0}
+        for user in users:
+            for start in range(0, options['samples'], self.batch_size):
+                count = min(self.batch_size, options['samples'] - start)
+                with transaction.atomic():
+                    samples, tasks, logs = self.create_batch(
+                        user, users, f'{prefix}-{user.pk}-', start, count, options, now
+                    )
+                totals['samples'] += len(samples)
+                totals['tasks'] += len(tasks)
+                totals['audit_logs'] += len(logs)
+            rebuild(user.pk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(users)} users, {totals['samples']} samples, {totals['tasks']} tasks "
+            f"and {totals['audit_logs']} audit logs."
+        ))
+
+    def create_batch(self, owner, analysts, sample_prefix, start, count, options, now):
+        rng = self.random
+        samples = []
+        for index in range(start, start + count):
+            sample = Sample(
+                sample_id=f'{sample_prefix}{index:07d}',
+                name=f'Sample {index}',
+                owner=owner,
+                status=rng.choice(SampleStatus.values),
+            )
+            sample.sync_completed_at()
+            samples.append(sample)
+        samples = Sample.objects.bulk_create(samples, batch_size=self.batch_size)
+
+        # auto_now_add overrides timestamps on insert, so spread them afterwards.
+        for sample in samples:
+            sample.created_at = now - timedelta(seconds=rng.randint(0, options['days'] * 86400))
+            if sample.completed_at is not None:
+                sample.completed_at = min(sample.created_at + timedelta(hours=rng.randint(1, 240)), now)
+        Sample.objects.bulk_update(samples, ['created_at', 'completed_at'], batch_size=self.batch_size)
+
+        tasks = []
+        for sample in samples:
+            for _ in range(options['tasks']):
+                status = rng.choice(TaskStatus.values)
+                completed = status == TaskStatus.COMPLETED
+                tasks.append(Task(
+                    sample=sample,
+                    name=rng.choice(TASK_NAMES),
+                    status=status,
+                    priority=rng.choice(TaskPriority.values),
+                    due_date=(sample.created_at + timedelta(days=rng.randint(1, 30))).date() if rng.random() < 0.8 else None,
+                    analyst=rng.choice(analysts) if rng.random() < 0.9 else None,
+                    result_text=rng.choice(['Pass', 'Fail', 'Inconclusive']) if completed else None,
+                    result_numeric=Decimal(rng.randint(0, 10 ** 7)) / 1000 if completed else None,
+                ))
+        tasks = Task.objects.bulk_create(tasks, batch_size=self.batch_size)
+
+        logs = []
+        for sample in samples:
+            for position in range(options['audit']):
+                action = "Sample registered." if position == 0 else (
+                    f"Status changed from '{rng.choice(SampleStatus.values)}' to '{rng.choice(SampleStatus.values)}'."
+                )
+                logs.append(AuditLog(sample=sample, actor=owner, action=action))
+        logs = AuditLog.objects.bulk_create(logs, batch_size=self.batch_size)
+        for log in logs:
+            log.timestamp = min(log.sample.created_at + timedelta(minutes=rng.randint(0, 60 * 24 * 7)), now)
+        AuditLog.objects.bulk_update(logs, ['timestamp'], batch_size=self.batch_size)
+
+        record_changes(owner.pk, ChangeKind.SAMPLE, [sample.pk for sample in samples])
+        record_changes(owner.pk, ChangeKind.TASK, [task.pk for task in tasks])
+        record_changes(owner.pk, ChangeKind.AUDIT_LOG, [log.pk for log in logs])
+        reindex([sample.pk for sample in samples])
+        return samples, tasks, logs
@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from samples.summary import rebuild
+
+class Command(BaseCommand):
+    help = "Recomputes the dashboard summary of every user (or one user) from the sample and task tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help="Only rebuild this user's summary.")
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['username']:
+            users = users.filter(username=options['username'])
+            if not users.exists():
+                raise CommandError(f"User '{options['username']}' does not exist.")
+        count = 0
+        for user_id in users.values_list('pk', flat=True).iterator():
+            rebuild(user_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} lab summaries."))
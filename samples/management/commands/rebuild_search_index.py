@@ -0,0 +1,30 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from samples.models import Sample
+from samples.search import reindex
+
+class Command(BaseCommand):
+    help = "Rebuilds the search documents of every sample (or one user's samples) from the sample and task tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help="Only rebuild this user's samples.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        samples = Sample.objects.order_by('pk')
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f"User '{options['username']}' does not exist.")
+            samples = samples.filter(owner=user)
+        count = 0
+        batch = []
+        for pk in samples.values_list('pk', flat=True).iterator(chunk_size=options['batch_size']):
+            batch.append(pk)
+            if len(batch) >= options['batch_size']:
+                reindex(batch)
+                count += len(batch)
+                batch = []
+        reindex(batch)
+        count += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the search documents of {count} samples."))
@@ -0,0 +1,216 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, in milliseconds.
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# A query shape run this many times in one request is reported as an N+1.
+N_PLUS_ONE_THRESHOLD = 5
+
+current_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+class RequestMetrics:
+    """Counters for one request, filled in by the DB wrapper and serializer timing."""
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializing = False
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # Called by record_query() for each of the request's queries. The SQL
+        # text carries placeholders, not values, so it is the query's shape.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+            self.shapes[sql] += 1
+
+    def repeated_queries(self, threshold=N_PLUS_ONE_THRESHOLD):
+        return {sql: count for sql, count in self.shapes.items() if count >= threshold}
+
+class Histograms:
+    """Per-URL-name latency histograms and query totals for this process."""
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route, total_ms, queries, n_plus_one):
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    'count': 0, 'sum_ms': 0.0, 'queries': 0, 'n_plus_one': 0,
+                    'buckets': [0] * (len(self.buckets) + 1),
+                }
+            entry['count'] += 1
+            entry['sum_ms'] += total_ms
+            entry['queries'] += queries
+            entry['n_plus_one'] += bool(n_plus_one)
+            index = next((i for i, bound in enumerate(self.buckets) if total_ms <= bound), len(self.buckets))
+            entry['buckets'][index] += 1
+
+    def snapshot(self):
+        labels = [f'le_{bound}' for bound in self.buckets] + ['le_inf']
+        with self._lock:
+            return {
+                route: {
+                    'count': entry['count'],
+                    'mean_ms': round(entry['sum_ms'] / entry['count'], 3),
+                    'mean_queries': round(entry['queries'] / entry['count'], 2),
+                    'n_plus_one': entry['n_plus_one'],
+                    'buckets': dict(zip(labels, entry['buckets'])),
+                }
+                for route, entry in sorted(self._routes.items())
+            }
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+histograms = Histograms()
+
+def record_query(execute, sql, params, many, context):
+    """
+    Installed on every database connection, whatever its alias: counts the
+    query against the metrics of the request being served, if any. The
+    context variable follows the request into sync_to_async threads.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+def install_query_recording(sender, connection, **kwargs):
+    """connection_created receiver."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+class RequestMetricsMiddleware:
+    """
+    Records the SQL query count and time, serializer time and total time of
+    each request. They are returned in a Server-Timing header, logged as one
+    JSON line on the `samples.metrics` logger (a warning when a query shape
+    repeats like an N+1) and added to the per-route histograms served at
+    /api/metrics/. Queries run while a streaming response is being sent
+    happen after this returns and are not counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Under ASGI, run on the event loop rather than in a thread of its own.
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.record(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.record(request, response, metrics, started)
+
+    def record(self, request, response, metrics, started):
+        """Set Server-Timing, update the histograms and log the request."""
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = metrics.db_seconds * 1000
+        serializer_ms = metrics.serializer_seconds * 1000
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.1f};desc="{metrics.queries} queries"',
+            f'serialize;dur={serializer_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        match = request.resolver_match
+        route = f"{request.method} {match.view_name if match else '<unmatched>'}"
+        repeated = metrics.repeated_queries()
+        histograms.observe(route, total_ms, metrics.queries, repeated)
+        record = {
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(db_ms, 2),
+            'serialize_ms': round(serializer_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }
+        if repeated:
+            record['n_plus_one'] = [{'sql': sql[:200], 'count': count} for sql, count in repeated.items()]
+            logger.warning(json.dumps(record))
+        elif logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(record))
+        return response
+
+@contextmanager
+def serializing():
+    """Add the time spent in the block to the request's serializer time."""
+    metrics = current_metrics.get()
+    # Only the outermost serializer is timed; nested ones run inside it.
+    if metrics is None or metrics.serializing:
+        yield
+        return
+    metrics.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_seconds += time.perf_counter() - started
+        metrics.serializing = False
+
+def timed_data(data_property):
+    """Wrap a serializer's `data` property to add its time to the request's metrics."""
+    getter = data_property.fget
+
+    def data(self):
+        with serializing():
+            return getter(self)
+
+    data.timed = True
+    return property(data)
+
+def install_serializer_timing():
+    """
+    Time Serializer.data and ListSerializer.data, where DRF does its
+    serializing, and count the queries of every database alias.
+    """
+    if 'samples.metrics.RequestMetricsMiddleware' not in settings.MIDDLEWARE:
+        return
+    connection_created.connect(install_query_recording, dispatch_uid='samples.metrics')
+    for connection in connections.all(initialized_only=True):
+        install_query_recording(None, connection)
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(serializer_class.data.fget, 'timed', False):
+            serializer_class.data = timed_data(serializer_class.data)
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.25 on 2026-10-18 12:42
+
+from django.db import migrations, models
+import samples.models
+
+
+def populate_priority_rank(apps, schema_editor):
+    Task = apps.get_model('samples', 'Task')
+    for priority, rank in samples.models.PRIORITY_RANKS.items():
+        Task.objects.filter(priority=priority).update(priority_rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('samples', '0006_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='priority_rank',
+            field=samples.models.PriorityRankField(default=1, editable=False),
+        ),
+        migrations.RunPython(populate_priority_rank, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'Completed'), _negated=True), fields=['analyst', 'priority_rank', 'due_date', 'created_at', 'id'], name='task_open_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.25 on 2026-10-18 12:46
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def populate_completed_at(apps, schema_editor):
+    """Use the latest "to 'Complete'" audit entry, or updated_at when there is none."""
+    Sample = apps.get_model('samples', 'Sample')
+    AuditLog = apps.get_model('samples', 'AuditLog')
+    completed_log = AuditLog.objects.filter(
+        sample=OuterRef('pk'), action__endswith="to 'Complete'."
+    ).order_by('-timestamp').values('timestamp')[:1]
+    Sample.objects.filter(status='Complete').update(
+        completed_at=Coalesce(Subquery(completed_log), F('updated_at'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('samples', '0008_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sample',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_completed_at, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='LabSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('samples_received', models.IntegerField(default=0)),
+                ('samples_processing', models.IntegerField(default=0)),
+                ('samples_analyzed', models.IntegerField(default=0)),
+                ('samples_complete', models.IntegerField(default=0)),
+                ('tasks_pending', models.IntegerField(default=0)),
+                ('tasks_in_progress', models.IntegerField(default=0)),
+                ('tasks_in_review', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+                ('turnaround_seconds', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='lab_summary', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-18 12:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('samples', '0009_lab_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sample',
+            index=models.Index(fields=['owner', 'updated_at'], name='sample_owner_updated_idx'),
+        ),
+    ]
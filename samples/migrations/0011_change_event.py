@@ -0,0 +1,53 @@
+# Generated by Django 4.2.25 on 2026-10-18 12:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_change_events(apps, schema_editor):
+    """Give every existing row one event, so a sync from cursor 0 sees the whole dataset."""
+    Sample = apps.get_model('samples', 'Sample')
+    Task = apps.get_model('samples', 'Task')
+    AuditLog = apps.get_model('samples', 'AuditLog')
+    ChangeEvent = apps.get_model('samples', 'ChangeEvent')
+    sources = [
+        ('sample', Sample.objects.filter(owner__isnull=False).values_list('pk', 'owner_id')),
+        ('task', Task.objects.filter(sample__owner__isnull=False).values_list('pk', 'sample__owner_id')),
+        ('auditlog', AuditLog.objects.filter(sample__owner__isnull=False).values_list('pk', 'sample__owner_id')),
+    ]
+    for kind, rows in sources:
+        batch = []
+        for pk, owner_id in rows.order_by('pk').iterator(chunk_size=2000):
+            batch.append(ChangeEvent(owner_id=owner_id, kind=kind, object_id=pk))
+            if len(batch) >= 2000:
+                ChangeEvent.objects.bulk_create(batch)
+                batch = []
+        ChangeEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('samples', '0010_sample_owner_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('sample', 'Sample'), ('task', 'Task'), ('auditlog', 'Audit log')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='change_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'id'], name='change_owner_id_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_change_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.2.25 on 2026-10-18 13:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+POSTGRESQL_FORWARDS = [
+    # 'simple': lab names and codes are not natural language, so no stemming.
+    """ALTER TABLE samples_samplesearchdocument ADD COLUMN search_vector tsvector
+       GENERATED ALWAYS AS (to_tsvector('simple', document)) STORED""",
+    "CREATE INDEX samples_search_vector_idx ON samples_samplesearchdocument USING GIN (search_vector)",
+    # Matches the UPPER(sample_id::text) LIKE 'X%' that istartswith generates.
+    "CREATE INDEX sample_owner_sample_id_prefix_idx ON samples_sample (owner_id, UPPER(sample_id::text) text_pattern_ops)",
+]
+POSTGRESQL_BACKWARDS = [
+    "DROP INDEX IF EXISTS sample_owner_sample_id_prefix_idx",
+]
+SQLITE_FORWARDS = [
+    """CREATE VIRTUAL TABLE samples_samplesearchdocument_fts USING fts5(
+       document, content='samples_samplesearchdocument', content_rowid='sample_id')""",
+    """CREATE TRIGGER samples_search_insert AFTER INSERT ON samples_samplesearchdocument BEGIN
+       INSERT INTO samples_samplesearchdocument_fts(rowid, document) VALUES (new.sample_id, new.document);
+       END""",
+    """CREATE TRIGGER samples_search_delete AFTER DELETE ON samples_samplesearchdocument BEGIN
+       INSERT INTO samples_samplesearchdocument_fts(samples_samplesearchdocument_fts, rowid, document)
+       VALUES ('delete', old.sample_id, old.document);
+       END""",
+    """CREATE TRIGGER samples_search_update AFTER UPDATE OF document ON samples_samplesearchdocument BEGIN
+       INSERT INTO samples_samplesearchdocument_fts(samples_samplesearchdocument_fts, rowid, document)
+       VALUES ('delete', old.sample_id, old.document);
+       INSERT INTO samples_samplesearchdocument_fts(rowid, document) VALUES (new.sample_id, new.document);
+       END""",
+]
+SQLITE_BACKWARDS = [
+    "DROP TABLE IF EXISTS samples_samplesearchdocument_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    statements = {'postgresql': POSTGRESQL_FORWARDS, 'sqlite': SQLITE_FORWARDS}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    # The table's own triggers, column and indexes go with it.
+    statements = {'postgresql': POSTGRESQL_BACKWARDS, 'sqlite': SQLITE_BACKWARDS}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def populate_search_documents(apps, schema_editor):
+    """The same documents samples.search.reindex builds: the name, then each task's name and result."""
+    Sample = apps.get_model('samples', 'Sample')
+    Task = apps.get_model('samples', 'Task')
+    SampleSearchDocument = apps.get_model('samples', 'SampleSearchDocument')
+    lines = {}
+    owners = {}
+    for pk, owner_id, name in Sample.objects.values_list('pk', 'owner_id', 'name').iterator(chunk_size=2000):
+        lines[pk] = [name]
+        owners[pk] = owner_id
+    for sample_id, name, result_text in Task.objects.order_by('id').values_list('sample_id', 'name', 'result_text').iterator(chunk_size=2000):
+        lines[sample_id].append(name)
+        if result_text:
+            lines[sample_id].append(result_text)
+    SampleSearchDocument.objects.bulk_create(
+        [SampleSearchDocument(sample_id=pk, owner_id=owners[pk], document='\n'.join(text)) for pk, text in lines.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('samples', '0012_archived_audit_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SampleSearchDocument',
+            fields=[
+                ('sample', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='samples.sample')),
+                ('document', models.TextField()),
+                ('owner', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.25 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('samples', '0013_sample_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sample',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from datetime import date, timedelta
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # Create your models here.
 class SampleStatus(models.TextChoices):
@@ -9,7 +10,46 @@ class SampleStatus(models.TextChoices):
     ANALYZED = 'Analyzed', 'Analyzed'
     COMPLETE = 'Complete', 'Complete'
 
-class Sample(models.Model):
+class VersionedModel(models.Model):
+    """
+    Adds a `version` that goes up by one on every update, for optimistic
+    concurrency control (see samples.concurrency). save() bumps it
+    unconditionally; save_if_version() only writes over the version read.
+    """
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'version'}
+        super().save(*args, **kwargs)
+
+    def save_if_version(self, expected):
+        """
+        Write every field, like save(), with one UPDATE that only matches
+        while the row is still at version `expected`, and bump the version.
+        Returns False, having written nothing, if another write got there
+        first. No row locks are taken.
+        """
+        fields = [
+            field for field in self._meta.concrete_fields
+            if not field.primary_key and field.name != 'version'
+        ]
+        values = {field.attname: field.pre_save(self, False) for field in fields}
+        updated = type(self)._base_manager.filter(pk=self.pk, version=expected).update(
+            version=expected + 1, **values
+        )
+        if not updated:
+            return False
+        self.version = expected + 1
+        return True
+
+class Sample(VersionedModel):
     """
     Represents a single laboratory sample.
     """
@@ -24,9 +64,38 @@ class Sample(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set when the sample reaches Complete; used for turnaround time.
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # The sample list: a user's samples, newest first.
+            models.Index(fields=['owner', '-created_at', '-id'], name='sample_owner_created_idx'),
+            # ETag validators: the newest updated_at among a user's samples.
+            models.Index(fields=['owner', 'updated_at'], name='sample_owner_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sample_id} ({self.name})"
+
+    def sync_completed_at(self):
+        """Keep completed_at in step with the status. Called on save and by bulk writes."""
+        if self.status == SampleStatus.COMPLETE:
+            if self.completed_at is None:
+                self.completed_at = timezone.now()
+        else:
+            self.completed_at = None
+
+    def save(self, *args, **kwargs):
+        self.sync_completed_at()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'completed_at'}
+        super().save(*args, **kwargs)
+
+    def save_if_version(self, expected):
+        self.sync_completed_at()
+        return super().save_if_version(expected)
     
 class TaskStatus(models.TextChoices):
     PENDING = 'Pending', 'Pending',
@@ -39,7 +108,29 @@ class TaskPriority(models.TextChoices):
     MEDIUM = 'Medium', 'Medium',
     LOW = 'Low', 'Low',
 
-class Task(models.Model):
+# Sort order for priorities; the text values do not sort correctly as strings.
+PRIORITY_RANKS = {
+    TaskPriority.HIGH: 0,
+    TaskPriority.MEDIUM: 1,
+    TaskPriority.LOW: 2,
+}
+
+class PriorityRankField(models.PositiveSmallIntegerField):
+    """
+    Stores the rank of the model's `priority` so queues can sort and index on it.
+    Like auto_now, the value is filled in on every save and bulk_create.
+    """
+    def __init__(self, *args, **kwargs):
+        kwargs['editable'] = False
+        kwargs.setdefault('default', PRIORITY_RANKS[TaskPriority.MEDIUM])
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        value = PRIORITY_RANKS.get(model_instance.priority, PRIORITY_RANKS[TaskPriority.MEDIUM])
+        setattr(model_instance, self.attname, value)
+        return value
+
+class Task(VersionedModel):
     """
     Represents a single unit of work associated with a Sample.
     This could be a synthesis step, a QC test, a purification, etc.
@@ -59,6 +150,7 @@ class Task(models.Model):
         choices=TaskPriority.choices,
         default=TaskPriority.MEDIUM
     )
+    priority_rank = PriorityRankField()
     
     due_date = models.DateField(null=True, blank=True)
     
@@ -77,6 +169,29 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['analyst', 'status'], name='task_analyst_status_idx'),
+            models.Index(fields=['status', 'due_date', 'priority'], name='task_status_due_idx'),
+            # Open work only: completed tasks never show up in a backlog or overdue query.
+            models.Index(
+                fields=['analyst', 'due_date'],
+                condition=~models.Q(status=TaskStatus.COMPLETED),
+                name='task_open_analyst_due_idx'
+            ),
+            models.Index(
+                fields=['due_date', 'priority'],
+                condition=~models.Q(status=TaskStatus.COMPLETED),
+                name='task_open_due_idx'
+            ),
+            # The analyst work queue, in its keyset order.
+            models.Index(
+                fields=['analyst', 'priority_rank', 'due_date', 'created_at', 'id'],
+                condition=~models.Q(status=TaskStatus.COMPLETED),
+                name='task_open_queue_idx'
+            ),
+        ]
+
     def __str__(self):
         return f"{self.name} for {self.sample.sample_id}"
 
@@ -89,5 +204,143 @@ class AuditLog(models.Model):
     action = models.TextField() # e.g., "Status changed from 'Processing' to 'Analyzed'."
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['sample', 'timestamp'], name='auditlog_sample_ts_idx'),
+            # Archiving walks the table oldest first (see samples.archive).
+            models.Index(fields=['timestamp', 'id'], name='auditlog_ts_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Log for {self.sample.sample_id} at {self.timestamp}"
+
+class ArchivedAuditLog(models.Model):
+    """
+    An AuditLog moved out of the hot table by `manage.py archive_audit_logs`.
+    It keeps the original id, so a sample's history pages the same across
+    both tables.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    sample = models.ForeignKey(Sample, on_delete=models.CASCADE, related_name="archived_audit_logs")
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="+")
+    action = models.TextField()
+    timestamp = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sample', 'timestamp'], name='archivedlog_sample_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived log for {self.sample.sample_id} at {self.timestamp}"
+
+class OutboxStatus(models.TextChoices):
+    PENDING = 'Pending', 'Pending'
+    SENT = 'Sent', 'Sent'
+    FAILED = 'Failed', 'Failed'
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting to be delivered by the `send_outbox` worker.
+    Rows are written in the same transaction as the change that triggers
+    them, so requests never wait on the mail server.
+    """
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+
+    status = models.CharField(
+        max_length=10,
+        choices=OutboxStatus.choices,
+        default=OutboxStatus.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                condition=models.Q(status=OutboxStatus.PENDING),
+                name='outbox_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+class LabSummary(models.Model):
+    """
+    Per-owner status counts and turnaround totals for the dashboard.
+    Kept up to date incrementally by the views (see samples.summary) and
+    recomputable with `manage.py rebuild_lab_summaries`.
+    """
+    owner = models.OneToOneField(User, on_delete=models.CASCADE, related_name="lab_summary")
+
+    samples_received = models.IntegerField(default=0)
+    samples_processing = models.IntegerField(default=0)
+    samples_analyzed = models.IntegerField(default=0)
+    samples_complete = models.IntegerField(default=0)
+
+    tasks_pending = models.IntegerField(default=0)
+    tasks_in_progress = models.IntegerField(default=0)
+    tasks_in_review = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0)
+
+    # Sum of (completed_at - created_at) over the owner's complete samples.
+    turnaround_seconds = models.FloatField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Summary for {self.owner}"
+
+
+class ChangeKind(models.TextChoices):
+    SAMPLE = 'sample', 'Sample'
+    TASK = 'task', 'Task'
+    AUDIT_LOG = 'auditlog', 'Audit log'
+
+class ChangeEvent(models.Model):
+    """
+    An append-only record that a sample, task or audit log was created,
+    changed or deleted. The auto-incrementing id is the cursor of the
+    /api/changes/ feed (record_changes keeps one owner's ids in commit
+    order); deleted rows leave an event with `deleted` set.
+    """
+    id = models.BigAutoField(primary_key=True)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="change_events")
+    kind = models.CharField(max_length=10, choices=ChangeKind.choices)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'id'], name='change_owner_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} {'deleted' if self.deleted else 'changed'}"
+
+class SampleSearchDocument(models.Model):
+    """
+    The searchable text of one sample: its name and its tasks' names and
+    results, one per line. Kept up to date by the views (see samples.search)
+    and rebuildable with `manage.py rebuild_search_index`. The full-text
+    index over `document` is created by migration 0013 for the database in
+    use: a generated tsvector column with a GIN index on PostgreSQL, an FTS5
+    table on SQLite.
+    """
+    sample = models.OneToOneField(Sample, on_delete=models.CASCADE, primary_key=True, related_name="search_document")
+    owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="+")
+    document = models.TextField()
+
     def __str__(self):
-        return f"Log for {self.sample.sample_id} at {self.timestamp}"
\ No newline at end of file
+        return f"Search document for sample {self.sample_id}"
@@ -0,0 +1,91 @@
+import logging
+from datetime import timedelta
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboxEmail, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 8
+BASE_BACKOFF = timedelta(seconds=30)
+MAX_BACKOFF = timedelta(hours=1)
+
+def enqueue_email(subject, body, from_email, recipients):
+    """
+    Queue an email for the outbox worker.
+    Call this inside the transaction that makes the email necessary, so the
+    message is only sent if that transaction commits.
+    """
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email,
+        recipients=list(recipients),
+    )
+
+def backoff(attempts):
+    """Delay before the next attempt: exponential, capped at MAX_BACKOFF."""
+    return min(BASE_BACKOFF * (2 ** (attempts - 1)), MAX_BACKOFF)
+
+def send_pending(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """
+    Deliver one batch of due outbox emails over a single mail connection.
+    Rows are claimed with SKIP LOCKED where the database supports it, so
+    several workers can drain the outbox at once.
+    Returns `(sent, failed)` counts for the batch.
+    """
+    sent = failed = 0
+    with transaction.atomic():
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxStatus.PENDING, next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not batch:
+            return sent, failed
+
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            logger.warning("Could not open mail connection: %s", e)
+            for email in batch:
+                schedule_retry(email, e, max_attempts)
+            OutboxEmail.objects.bulk_update(batch, ['status', 'attempts', 'next_attempt_at', 'last_error'])
+            return sent, len(batch)
+
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email,
+                    to=email.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as e:
+                    logger.warning("Error sending outbox email %s: %s", email.pk, e)
+                    schedule_retry(email, e, max_attempts)
+                    failed += 1
+                else:
+                    email.status = OutboxStatus.SENT
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+        finally:
+            connection.close()
+
+        OutboxEmail.objects.bulk_update(batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+    return sent, failed
+
+def schedule_retry(email, error, max_attempts):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = OutboxStatus.FAILED
+    else:
+        email.next_attempt_at = timezone.now() + backoff(email.attempts)
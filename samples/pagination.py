@@ -0,0 +1,184 @@
+import heapq
+import json
+from base64 import b64decode, b64encode
+from datetime import date, datetime
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+class SampleCursorPagination(CursorPagination):
+    """
+    Cursor pagination for the sample list, newest first.
+    The cursor is keyed on created_at with id as a tie-breaker, so page cost
+    stays flat no matter how deep into a lab's history the client scrolls.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination whose cursor encodes the last row of the page, returned as
+    `{'next': url or null, 'results': [...]}`. Subclasses set `self.page` and
+    `self.has_next` in paginate_queryset and implement encode_cursor.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, row):
+        raise NotImplementedError
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+class TaskQueueKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for the analyst work queue.
+    The queue is ordered by (priority_rank, due_date nulls last, created_at, id)
+    and the cursor encodes the last row of the page, so each page is an index
+    range scan instead of an OFFSET over every earlier task.
+    """
+    ordering = ('priority_rank', F('due_date').asc(nulls_last=True), 'created_at', 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.after(*position))
+        rows = list(queryset.order_by(*self.ordering)[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def after(self, rank, due_date, created_at, pk):
+        """Rows that sort strictly after the given position."""
+        tail = Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+        if due_date is None:
+            same_rank = Q(due_date__isnull=True) & tail
+        else:
+            same_rank = Q(due_date__gt=due_date) | Q(due_date__isnull=True) | (Q(due_date=due_date) & tail)
+        return Q(priority_rank__gt=rank) | (Q(priority_rank=rank) & same_rank)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            rank, due_date, created_at, pk = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            return (
+                int(rank),
+                date.fromisoformat(due_date) if due_date else None,
+                datetime.fromisoformat(created_at),
+                int(pk),
+            )
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound('Invalid cursor')
+
+    def encode_cursor(self, task):
+        position = [
+            task.priority_rank,
+            task.due_date.isoformat() if task.due_date else None,
+            task.created_at.isoformat(),
+            task.pk,
+        ]
+        return b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+class AuditHistoryPagination(KeysetPagination):
+    """
+    Keyset pagination over an audit history kept in several tables (recent
+    and archived logs), newest first. paginate_queryset takes one values()
+    queryset per table; each is read from the cursor position by
+    (timestamp, id) and the results merged, so a page costs one index range
+    scan per table however far back it is.
+    """
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        pages = []
+        for tier in queryset:
+            if position is not None:
+                timestamp, pk = position
+                tier = tier.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+            pages.append(list(tier.order_by('-timestamp', '-id')[:self.page_size + 1]))
+        rows = list(heapq.merge(*pages, key=self.position, reverse=True))
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def position(self, row):
+        return row['timestamp'], row['pk']
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            timestamp, pk = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            return datetime.fromisoformat(timestamp), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound('Invalid cursor')
+
+    def encode_cursor(self, row):
+        timestamp, pk = self.position(row)
+        return b64encode(json.dumps([timestamp.isoformat(), pk]).encode('utf-8')).decode('ascii')
+
+class SearchPagination(KeysetPagination):
+    """
+    Pagination for ranked search results, which have no stable key to seek
+    on: the cursor is the offset of the next page. paginate_queryset takes
+    a function `(offset, limit)` returning that slice of the results.
+    Results past max_results are not served.
+    """
+    page_size = 20
+    max_page_size = 100
+    max_results = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.offset = self.decode_cursor(request)
+        limit = min(self.page_size + 1, self.max_results - self.offset)
+        rows = queryset(self.offset, limit) if limit > 0 else []
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return 0
+        try:
+            offset = int(json.loads(b64decode(encoded.encode('ascii')).decode('utf-8')))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound('Invalid cursor')
+        if not 0 <= offset < self.max_results:
+            raise NotFound('Invalid cursor')
+        return offset
+
+    def encode_cursor(self, row):
+        return b64encode(json.dumps(self.offset + len(self.page)).encode('utf-8')).decode('ascii')
@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+class CSVRenderer(BaseRenderer):
+    """
+    Selects CSV output for the export endpoints, which stream their own body.
+    Only non-streamed responses (errors) are rendered here.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        items = data.items() if isinstance(data, dict) else enumerate(data)
+        for key, value in items:
+            if isinstance(value, list):
+                value = ' '.join(str(item) for item in value)
+            writer.writerow([key, value])
+        return buffer.getvalue().encode(self.charset)
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Selects NDJSON output for the export endpoints, which stream their own body.
+    Only non-streamed responses (errors) are rendered here.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, cls=DjangoJSONEncoder) + '\n').encode(self.charset)
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders the same bytes as DRF's JSONRenderer, using orjson when it is
+    installed. Datetimes, dates, times, Decimals and anything else orjson
+    does not handle natively go through DRF's encoder, so `Z` suffixes and
+    Decimal coercion match. Indented output (the browsable API, or an
+    `indent` media type parameter), the non-default COMPACT_JSON and
+    UNICODE_JSON settings, data orjson rejects (integers beyond 64 bits,
+    non-string keys) and installs without orjson use JSONRenderer.
+    Floats are the one difference: orjson writes `1e16` where the standard
+    library writes `1e+16`, and NaN as null rather than raising.
+    """
+    if orjson is not None:
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if (not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer escapes these so the output is also valid JavaScript.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,82 @@
+import contextvars
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+# The alias reads go to while set; None means the router has no opinion.
+read_database = contextvars.ContextVar('read_database', default=None)
+
+@contextmanager
+def reading_from(alias):
+    token = read_database.set(alias)
+    try:
+        yield
+    finally:
+        read_database.reset(token)
+
+def pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+def pin_to_primary(user_id):
+    """Send the user's reads to the primary for REPLICA_READ_YOUR_WRITES_SECONDS, so they see their own writes."""
+    caches[settings.REPLICA_PIN_CACHE].set(pin_key(user_id), True, settings.REPLICA_READ_YOUR_WRITES_SECONDS)
+
+def pinned_to_primary(user_id):
+    return caches[settings.REPLICA_PIN_CACHE].get(pin_key(user_id)) is not None
+
+class ReplicaRouter:
+    """
+    Sends reads to settings.REPLICA_DATABASE while a request has opted in
+    (see ReplicaReadMixin), except inside a transaction on the primary.
+    Writes and migrations always use the primary.
+    """
+    def db_for_read(self, model, **hints):
+        alias = read_database.get()
+        if alias is None or connections['default'].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases hold the same rows.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+def replica_reads(streaming_content, alias):
+    """Keep reading from the replica while a streamed body (an export) is produced after the view returns."""
+    with reading_from(alias):
+        yield from streaming_content
+
+class ReplicaReadMixin:
+    """
+    Serves the view's safe requests from the read replica, once the user is
+    authenticated and unless they wrote something in the last
+    REPLICA_READ_YOUR_WRITES_SECONDS. Unsafe requests pin the user to the
+    primary for that long. Does nothing without a REPLICA_DATABASE.
+    """
+    replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        alias = settings.REPLICA_DATABASE
+        if alias is None or not request.user.is_authenticated:
+            return
+        if request.method not in SAFE_METHODS:
+            pin_to_primary(request.user.pk)
+        elif not pinned_to_primary(request.user.pk):
+            self.replica_token = read_database.set(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.replica_token is not None:
+            read_database.reset(self.replica_token)
+            self.replica_token = None
+            if response.streaming:
+                response.streaming_content = replica_reads(response.streaming_content, settings.REPLICA_DATABASE)
+        return response
@@ -0,0 +1,85 @@
+import re
+from django.db import connection
+from .models import Sample, SampleSearchDocument
+
+# Queries are reduced to at most this many word terms; every term must match.
+MAX_TERMS = 8
+# Letters and digits; both full-text indexes split words on everything else.
+TERM = re.compile(r'[^\W_]+')
+
+POSTGRESQL_SEARCH = """
+    SELECT sample_id FROM samples_samplesearchdocument, to_tsquery('simple', %s) query
+    WHERE owner_id = %s AND search_vector @@ query
+    ORDER BY ts_rank_cd(search_vector, query) DESC, sample_id DESC
+    LIMIT %s
+"""
+# bm25() is lower for better matches.
+SQLITE_SEARCH = """
+    SELECT fts.rowid FROM samples_samplesearchdocument_fts fts
+    JOIN samples_samplesearchdocument document ON document.sample_id = fts.rowid
+    WHERE samples_samplesearchdocument_fts MATCH %s AND document.owner_id = %s
+    ORDER BY bm25(samples_samplesearchdocument_fts), fts.rowid DESC
+    LIMIT %s
+"""
+
+def reindex(sample_ids):
+    """
+    Rebuild the search documents of `sample_ids` from their name, task names
+    and task results. Call inside the transaction that changes any of them.
+    """
+    rows = Sample.objects.filter(pk__in=sample_ids).order_by('pk', 'tasks__id').values_list(
+        'pk', 'owner_id', 'name', 'tasks__name', 'tasks__result_text'
+    )
+    documents = {}
+    for pk, owner_id, name, task_name, result_text in rows:
+        if pk not in documents:
+            documents[pk] = SampleSearchDocument(sample_id=pk, owner_id=owner_id, document=name)
+        # Skip the NULL task of a sample without tasks, and empty results.
+        for text in (task_name, result_text):
+            if text:
+                documents[pk].document += '\n' + text
+    SampleSearchDocument.objects.bulk_create(
+        documents.values(), update_conflicts=True, unique_fields=['sample'], update_fields=['owner', 'document'],
+        batch_size=1000,
+    )
+
+def terms(query):
+    return TERM.findall(query.lower())[:MAX_TERMS]
+
+def matching_text(user, query, limit):
+    """
+    Ids of the user's samples whose document has a word starting with each
+    term of `query`, best match first, from the full-text index.
+    """
+    words = terms(query)
+    if not words:
+        return []
+    if connection.vendor == 'postgresql':
+        sql, match = POSTGRESQL_SEARCH, ' & '.join(f'{word}:*' for word in words)
+    elif connection.vendor == 'sqlite':
+        sql, match = SQLITE_SEARCH, ' '.join(f'"{word}"*' for word in words)
+    else:
+        # No full-text index on this database: a scan, in no particular order.
+        documents = SampleSearchDocument.objects.filter(owner=user)
+        for word in words:
+            documents = documents.filter(document__icontains=word)
+        return list(documents.values_list('sample_id', flat=True)[:limit])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, user.pk, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+def search_samples(user, query, offset, limit):
+    """
+    Ids of the user's samples matching `query`, `offset` results in: those
+    whose sample_id starts with it (in sample_id order) first, then
+    full-text matches on the name, task names and results by rank.
+    """
+    wanted = offset + limit
+    ids = list(
+        Sample.objects.filter(owner=user, sample_id__istartswith=query)
+        .order_by('sample_id').values_list('pk', flat=True)[:wanted]
+    )
+    if len(ids) < wanted:
+        seen = set(ids)
+        ids += [pk for pk in matching_text(user, query, wanted) if pk not in seen]
+    return ids[offset:wanted]
@@ -1,6 +1,9 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from samples.models import AuditLog, Sample, Task
+from samples.models import AuditLog, Sample, SampleStatus, Task, TaskStatus
+
+# Upper bound on the number of items accepted by a single bulk request.
+BULK_MAX_ITEMS = 5000
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -53,7 +56,7 @@ class TaskSerializer(serializers.ModelSerializer):
             'analyst', # This is for WRITING (takes an ID)
             'analyst_username', # This is for READING
             'result_text', 'result_numeric',
-            'created_at', 'updated_at'
+            'created_at', 'updated_at', 'version'
         ]
 
 class SampleSerializer(serializers.ModelSerializer):
@@ -71,9 +74,113 @@ class SampleSerializer(serializers.ModelSerializer):
             'status', 
             'created_at', 
             'updated_at',
+            'version',
             'audit_logs',
             'tasks'
         ]
         
     def create(self, validated_data):
-        return Sample.objects.create(**validated_data)
\ No newline at end of file
+        return Sample.objects.create(**validated_data)
+
+class SampleListSerializer(serializers.ModelSerializer):
+    """
+    A slim, read-only serializer for the sample list.
+    Instead of embedding every task and audit log, it exposes counts and the
+    most recent audit entry, which are annotated onto the queryset by the view.
+    """
+    owner_username = serializers.CharField(source='owner.username', read_only=True)
+    task_count = serializers.IntegerField(read_only=True)
+    open_task_count = serializers.IntegerField(read_only=True)
+    latest_action = serializers.CharField(read_only=True, allow_null=True)
+    latest_action_at = serializers.DateTimeField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Sample
+        fields = [
+            'id',
+            'sample_id',
+            'name',
+            'owner_username',
+            'status',
+            'created_at',
+            'updated_at',
+            'version',
+            'task_count',
+            'open_task_count',
+            'latest_action',
+            'latest_action_at',
+        ]
+        read_only_fields = fields
+
+class BulkAnalystField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves analyst ids against the `users` map in the serializer context,
+    which the bulk view loads with one query for the whole batch.
+    """
+    def to_internal_value(self, data):
+        users = self.context.get('users')
+        if users is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return users[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+class BulkTaskSerializer(TaskSerializer):
+    analyst = BulkAnalystField(
+        queryset=User.objects.all(),
+        allow_null=True,
+        required=False
+    )
+
+class BulkSampleSerializer(SampleSerializer):
+    """
+    Validates a single item of a bulk upload, including its optional tasks.
+    sample_id uniqueness is checked once for the whole batch by the view,
+    so the per-item unique validator is dropped here.
+    """
+    tasks = BulkTaskSerializer(many=True, required=False)
+
+    class Meta(SampleSerializer.Meta):
+        extra_kwargs = {'sample_id': {'validators': []}}
+
+class SampleTransitionSerializer(serializers.Serializer):
+    """
+    Input for a bulk status transition: the ids to move and the target status.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=BULK_MAX_ITEMS)
+    status = serializers.ChoiceField(choices=SampleStatus.choices)
+
+class TaskTransitionSerializer(SampleTransitionSerializer):
+    status = serializers.ChoiceField(choices=TaskStatus.choices)
+
+class TaskQueueSerializer(TaskSerializer):
+    """
+    A task as it appears in an analyst's work queue, with its parent sample.
+    """
+    sample = serializers.PrimaryKeyRelatedField(read_only=True)
+    sample_code = serializers.CharField(source='sample.sample_id', read_only=True)
+
+    class Meta(TaskSerializer.Meta):
+        fields = ['sample', 'sample_code'] + TaskSerializer.Meta.fields
+
+class ChangeSampleSerializer(serializers.ModelSerializer):
+    """
+    A sample as reported by the change feed; tasks and audit logs are
+    reported separately.
+    """
+    owner_username = serializers.CharField(source='owner.username', read_only=True)
+
+    class Meta:
+        model = Sample
+        fields = ['id', 'sample_id', 'name', 'owner_username', 'status', 'created_at', 'updated_at', 'version']
+
+class ChangeAuditLogSerializer(AuditLogSerializer):
+    sample = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta(AuditLogSerializer.Meta):
+        fields = ['id', 'sample', 'actor_username', 'action', 'timestamp']
@@ -1,26 +1,38 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
-from django.core.mail import send_mail
+from .authentication import token_cache
+from .outbox import enqueue_email
 
 # This signal creates a Token for a new user right after they are saved
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created and instance:
         Token.objects.create(user=instance)
-        
-        try:
-            send_mail(
-                subject=f'New Limsly User: {instance.username}',
-                message=(
-                    f"A new user has just signed up for Limsly!\n\n"
-                    f"Username: {instance.username}\n"
-                    f"Email: {instance.email}"
-                ),
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=['tvarzeas@limsly.com'],
-                fail_silently=False,
-            )
-        except Exception as e:
-            print(f"Error sending new user email: {e}")
\ No newline at end of file
+
+        # The notification goes through the outbox, so signups never wait on
+        # the mail server; the send_outbox worker delivers it.
+        enqueue_email(
+            subject=f'New Limsly User: {instance.username}',
+            body=(
+                f"A new user has just signed up for Limsly!\n\n"
+                f"Username: {instance.username}\n"
+                f"Email: {instance.email}"
+            ),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipients=['tvarzeas@limsly.com'],
+        )
+
+# Cached token lookups must not outlive the token or a change to its user
+# (e.g. deactivation).
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance=None, **kwargs):
+    if instance:
+        token_cache.invalidate(instance.key)
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance=None, created=False, **kwargs):
+    if instance and not created:
+        keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+        token_cache.invalidate_user(instance.pk, keys if token_cache.shared_cache is not None else ())
@@ -0,0 +1,104 @@
+from collections import Counter
+from datetime import timedelta
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.utils import timezone
+from .models import LabSummary, Sample, SampleStatus, Task, TaskStatus
+
+# LabSummary column for each status.
+SAMPLE_STATUS_FIELDS = {
+    SampleStatus.RECEIVED: 'samples_received',
+    SampleStatus.PROCESSING: 'samples_processing',
+    SampleStatus.ANALYZED: 'samples_analyzed',
+    SampleStatus.COMPLETE: 'samples_complete',
+}
+
+TASK_STATUS_FIELDS = {
+    TaskStatus.PENDING: 'tasks_pending',
+    TaskStatus.IN_PROGRESS: 'tasks_in_progress',
+    TaskStatus.IN_REVIEW: 'tasks_in_review',
+    TaskStatus.COMPLETED: 'tasks_completed',
+}
+
+def turnaround_seconds(created_at, completed_at):
+    if created_at is None or completed_at is None:
+        return 0.0
+    return max((completed_at - created_at).total_seconds(), 0.0)
+
+class SummaryDelta:
+    """
+    Collects changes to one owner's LabSummary and applies them with a single
+    UPDATE. Call apply() in the same transaction as the writes it describes.
+    """
+    def __init__(self, owner_id):
+        self.owner_id = owner_id
+        self.counts = Counter()
+        self.turnaround_seconds = 0.0
+
+    def add_sample(self, status, created_at=None, completed_at=None, sign=1):
+        self.counts[SAMPLE_STATUS_FIELDS[status]] += sign
+        self.turnaround_seconds += sign * turnaround_seconds(created_at, completed_at)
+
+    def remove_sample(self, status, created_at=None, completed_at=None):
+        self.add_sample(status, created_at, completed_at, sign=-1)
+
+    def add_task(self, status, count=1):
+        self.counts[TASK_STATUS_FIELDS[status]] += count
+
+    def remove_task(self, status, count=1):
+        self.add_task(status, -count)
+
+    def apply(self):
+        if self.owner_id is None:
+            return
+        changes = {field: F(field) + delta for field, delta in self.counts.items() if delta}
+        if self.turnaround_seconds:
+            changes['turnaround_seconds'] = F('turnaround_seconds') + self.turnaround_seconds
+        if not changes:
+            return
+        changes['updated_at'] = timezone.now()
+        if not LabSummary.objects.filter(owner_id=self.owner_id).update(**changes):
+            # First change for this owner: the full count already includes it.
+            rebuild(self.owner_id)
+
+def rebuild(owner_id):
+    """Recompute one owner's summary from scratch with two aggregate queries."""
+    samples = Sample.objects.filter(owner_id=owner_id).aggregate(
+        turnaround=Sum(
+            ExpressionWrapper(F('completed_at') - F('created_at'), output_field=DurationField()),
+            filter=Q(status=SampleStatus.COMPLETE),
+        ),
+        **{field: Count('id', filter=Q(status=status)) for status, field in SAMPLE_STATUS_FIELDS.items()}
+    )
+    tasks = Task.objects.filter(sample__owner_id=owner_id).aggregate(
+        **{field: Count('id', filter=Q(status=status)) for status, field in TASK_STATUS_FIELDS.items()}
+    )
+    turnaround = samples.pop('turnaround') or timedelta(0)
+    summary, _ = LabSummary.objects.update_or_create(
+        owner_id=owner_id,
+        defaults={**samples, **tasks, 'turnaround_seconds': turnaround.total_seconds()},
+    )
+    return summary
+
+def dashboard(user):
+    """The dashboard payload for `user`."""
+    summary = LabSummary.objects.filter(owner=user).first() or rebuild(user.pk)
+    overdue = (
+        Task.objects.filter(sample__owner=user, due_date__lt=timezone.localdate())
+        .exclude(status=TaskStatus.COMPLETED)
+        .values('analyst__username')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'analyst__username')
+    )
+    completed = summary.samples_complete
+    return {
+        'samples_by_status': {status: getattr(summary, field) for status, field in SAMPLE_STATUS_FIELDS.items()},
+        'tasks_by_status': {status: getattr(summary, field) for status, field in TASK_STATUS_FIELDS.items()},
+        'overdue_tasks_by_analyst': [
+            {'analyst': row['analyst__username'], 'count': row['count']} for row in overdue
+        ],
+        'turnaround': {
+            'completed_samples': completed,
+            'average_seconds': summary.turnaround_seconds / completed if completed else None,
+        },
+        'updated_at': summary.updated_at,
+    }
@@ -1,3 +1,1392 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import statistics
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework.authtoken.models import Token
+from samples import analytics, events
+from samples.asgi import EventStreamApp
+from samples.archive import archivable
+from samples.authentication import token_cache
+from samples.changes import record_changes
+from samples.models import ArchivedAuditLog, AuditLog, ChangeKind, LabSummary, OutboxEmail, OutboxStatus, Sample, Task
+from samples.exports import SAMPLE_COLUMNS
+from samples.fast_serializers import ValuesSerializer
+from samples.metrics import N_PLUS_ONE_THRESHOLD, RequestMetrics, current_metrics, histograms
+from samples.outbox import send_pending
+from samples.parsers import FastJSONParser
+from samples.renderers import FastJSONRenderer
+from samples.replicas import pin_key, read_database
+from samples.serializers import SampleSerializer, TaskSerializer
+from samples.summary import rebuild
+from samples.throttling import TokenBuckets, admit, buckets, parse_rate
 
-# Create your tests here.
+class SampleQueryCountTests(APITestCase):
+    """
+    The number of queries for sample list/retrieve must not grow with the
+    number of samples, tasks or audit logs.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.analyst = User.objects.create_user('analyst', 'analyst@example.com', 'password')
+        self.client.force_authenticate(self.user)
+
+    def add_samples(self, count):
+        for _ in range(count):
+            index = Sample.objects.count()
+            sample = Sample.objects.create(sample_id=f'S-{index}', name=f'Sample {index}', owner=self.user)
+            for task_index in range(3):
+                Task.objects.create(sample=sample, name=f'Task {task_index}', analyst=self.analyst)
+            for log_index in range(3):
+                AuditLog.objects.create(sample=sample, actor=self.analyst, action=f'Entry {log_index}')
+        return sample
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assert_constant_queries(self, url_for_sample):
+        sample = self.add_samples(1)
+        baseline = self.count_queries(url_for_sample(sample))
+        sample = self.add_samples(5)
+        self.assertEqual(self.count_queries(url_for_sample(sample)), baseline)
+
+    def test_list_query_count_is_constant(self):
+        self.assert_constant_queries(lambda sample: '/api/samples/')
+
+    def test_list_counts_tasks_without_grouping_every_sample(self):
+        sample = self.add_samples(1)
+        Task.objects.filter(pk=sample.tasks.first().pk).update(status='Completed')
+        Sample.objects.create(sample_id='S-EMPTY', name='Empty', owner=self.user)
+        with CaptureQueriesContext(connection) as context:
+            rows = {row['sample_id']: row for row in self.client.get('/api/samples/').data['results']}
+        self.assertEqual((rows['S-0']['task_count'], rows['S-0']['open_task_count']), (3, 2))
+        self.assertEqual((rows['S-EMPTY']['task_count'], rows['S-EMPTY']['open_task_count']), (0, 0))
+        # A GROUP BY would make the database sort all of the user's samples before the first page.
+        self.assertFalse(any('GROUP BY' in query['sql'] for query in context.captured_queries))
+
+    def test_expanded_list_query_count_is_constant(self):
+        self.assert_constant_queries(lambda sample: '/api/samples/?expand=full')
+
+    def test_retrieve_query_count_is_constant(self):
+        sample = self.add_samples(1)
+        baseline = self.count_queries(f'/api/samples/{sample.pk}/')
+        for index in range(10):
+            Task.objects.create(sample=sample, name=f'Extra {index}', analyst=self.analyst)
+            AuditLog.objects.create(sample=sample, actor=self.analyst, action=f'Extra {index}')
+        self.assertEqual(self.count_queries(f'/api/samples/{sample.pk}/'), baseline)
+
+    def test_update_query_count_is_constant(self):
+        def count_update_queries(sample, status):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.patch(f'/api/samples/{sample.pk}/', {'status': status})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['tasks']), Task.objects.filter(sample=sample).count())
+            return len(context.captured_queries)
+
+        sample = self.add_samples(1)
+        # The first status change also creates the owner's summary row.
+        count_update_queries(sample, 'Processing')
+        baseline = count_update_queries(sample, 'Analyzed')
+        for index in range(10):
+            Task.objects.create(sample=sample, name=f'Extra {index}', analyst=self.analyst)
+            AuditLog.objects.create(sample=sample, actor=self.analyst, action=f'Extra {index}')
+        self.assertEqual(count_update_queries(sample, 'Complete'), baseline)
+
+class OutboxTests(TestCase):
+    def test_signup_queues_notification_without_sending(self):
+        User.objects.create_user('newuser', 'new@example.com', 'password')
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.status, OutboxStatus.PENDING)
+        self.assertIn('newuser', email.subject)
+
+    def test_send_pending_delivers_batch(self):
+        for index in range(3):
+            User.objects.create_user(f'user{index}', f'user{index}@example.com', 'password')
+        self.assertEqual(send_pending(batch_size=10), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxStatus.SENT).exists())
+
+    def test_failed_send_is_retried_later(self):
+        User.objects.create_user('newuser', 'new@example.com', 'password')
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError('Connection refused')):
+            self.assertEqual(send_pending(), (0, 1))
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.status, OutboxStatus.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, 'Connection refused')
+        # Not due yet, so the next run leaves it alone.
+        self.assertEqual(send_pending(), (0, 0))
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeat_requests_skip_token_query(self):
+        self.assertEqual(self.client.get('/api/user/').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/user/').status_code, 200)
+        stats = token_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get('/api/user/')
+        self.token.delete()
+        self.assertEqual(self.client.get('/api/user/').status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get('/api/user/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/user/').status_code, 401)
+
+class DashboardTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.user)
+
+    def summary_values(self):
+        return LabSummary.objects.filter(owner=self.user).values().get()
+
+    def test_incremental_summary_matches_rebuild(self):
+        first = self.client.post('/api/samples/', {'sample_id': 'S-1', 'name': 'One'}).data['id']
+        second = self.client.post('/api/samples/', {'sample_id': 'S-2', 'name': 'Two'}).data['id']
+        self.client.post('/api/samples/bulk/', [
+            {'sample_id': 'S-3', 'name': 'Three', 'status': 'Complete', 'tasks': [{'name': 'QC'}]},
+            {'sample_id': 'S-4', 'name': 'Four', 'tasks': [{'name': 'QC', 'status': 'Completed'}]},
+        ], format='json')
+        task = self.client.post(f'/api/samples/{first}/tasks/', {'name': 'Assay'}).data['id']
+        self.client.post(f'/api/samples/{first}/tasks/', {'name': 'Review'})
+        self.client.patch(f'/api/samples/{first}/tasks/{task}/', {'status': 'In Review'})
+        self.client.patch(f'/api/samples/{first}/', {'status': 'Complete'})
+        self.client.post('/api/samples/transition/', {'ids': [first, second], 'status': 'Analyzed'}, format='json')
+        self.client.post(f'/api/samples/{first}/tasks/transition/', {'ids': [task], 'status': 'Completed'}, format='json')
+        self.client.delete(f'/api/samples/{second}/')
+
+        incremental = self.summary_values()
+        rebuild(self.user.pk)
+        rebuilt = self.summary_values()
+        for values in (incremental, rebuilt):
+            values.pop('updated_at')
+            values['turnaround_seconds'] = round(values['turnaround_seconds'], 3)
+        self.assertEqual(incremental, rebuilt)
+
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.data['samples_by_status'], {
+            'Received': 1, 'Processing': 0, 'Analyzed': 1, 'Complete': 1,
+        })
+        self.assertEqual(response.data['tasks_by_status'], {
+            'Pending': 2, 'In Progress': 0, 'In Review': 0, 'Completed': 2,
+        })
+        self.assertEqual(response.data['turnaround']['completed_samples'], 1)
+
+class SampleBulkTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.analyst = User.objects.create_user('analyst', 'analyst@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        Sample.objects.create(sample_id='S-1', name='Existing', owner=self.user)
+
+    def bulk(self, items):
+        return self.client.post('/api/samples/bulk/', items, format='json')
+
+    def test_all_valid_is_created(self):
+        response = self.bulk([
+            {'sample_id': 'S-2', 'name': 'Two', 'tasks': [{'name': 'Assay', 'analyst': self.analyst.pk}]},
+            {'sample_id': 'S-3', 'name': 'Three', 'tasks': [{'name': 'QC', 'analyst': str(self.analyst.pk)}]},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row['sample_id'] for row in response.data['created']], ['S-2', 'S-3'])
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(Task.objects.filter(analyst=self.analyst).count(), 2)
+        self.assertEqual(AuditLog.objects.filter(sample__sample_id__in=['S-2', 'S-3']).count(), 2)
+
+    def test_invalid_items_are_reported_by_index(self):
+        response = self.bulk([
+            {'sample_id': 'S-2', 'name': 'Two'},
+            {'sample_id': 'S-1', 'name': 'Taken'},
+            {'sample_id': 'S-2', 'name': 'Repeated'},
+            {'sample_id': 'S-4', 'name': 'Four', 'tasks': [{'name': 'Assay', 'analyst': 999999}]},
+            'not a sample',
+        ])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([row['index'] for row in response.data['created']], [0])
+        errors = {error['index']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(sorted(errors), [1, 2, 3, 4])
+        self.assertIn('sample_id', errors[1])
+        self.assertIn('sample_id', errors[2])
+        self.assertIn('analyst', errors[3]['tasks'][0])
+        self.assertIn('non_field_errors', errors[4])
+        self.assertEqual(Sample.objects.get(sample_id='S-2').name, 'Two')
+        self.assertFalse(Sample.objects.filter(sample_id='S-4').exists())
+
+    def test_nothing_valid_is_a_400(self):
+        response = self.bulk([{'sample_id': 'S-1', 'name': 'Taken'}, {'name': 'No id'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], [])
+        self.assertEqual([error['index'] for error in response.data['errors']], [0, 1])
+        self.assertEqual(self.bulk({'sample_id': 'S-2', 'name': 'Not a list'}).status_code, 400)
+
+    def test_ndjson(self):
+        body = b'{"sample_id": "S-2", "name": "Two"}\n\n{"sample_id": "S-3", "name": "Three"}\n'
+        response = self.client.post('/api/samples/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row['index'] for row in response.data['created']], [0, 1])
+        bad = self.client.post('/api/samples/bulk/', b'{"sample_id": "S-4"}\n{oops', content_type='application/x-ndjson')
+        self.assertEqual(bad.status_code, 400)
+        self.assertIn('line 2', bad.data['detail'])
+
+    def test_concurrent_registration_is_a_409(self):
+        bulk_create = Sample.objects.bulk_create
+
+        def racing_bulk_create(samples, *args, **kwargs):
+            # Another request registers S-2 between the uniqueness check and the insert.
+            Sample.objects.create(sample_id='S-2', name='Racer', owner=self.user)
+            return bulk_create(samples, *args, **kwargs)
+
+        with mock.patch.object(Sample.objects, 'bulk_create', racing_bulk_create):
+            response = self.bulk([{'sample_id': 'S-2', 'name': 'Two'}, {'sample_id': 'S-3', 'name': 'Three'}])
+        self.assertEqual(response.status_code, 409)
+        # Nothing from the batch is kept (the mocked racer ran inside its transaction).
+        self.assertFalse(Sample.objects.filter(sample_id__in=['S-2', 'S-3']).exists())
+        self.assertFalse(AuditLog.objects.filter(sample__sample_id='S-3').exists())
+
+class TaskQueueTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.analyst = User.objects.create_user('analyst', 'analyst@example.com', 'password')
+        self.client.force_authenticate(self.analyst)
+        sample = Sample.objects.create(sample_id='S-1', name='Sample', owner=self.user)
+        same_time = timezone.now() - timedelta(days=1)
+        specs = [
+            ('Low', date(2026, 1, 1), 'Pending'),
+            ('High', None, 'In Progress'),
+            ('Medium', date(2026, 1, 5), 'Pending'),
+            ('High', date(2026, 1, 9), 'In Review'),
+            ('Medium', None, 'Pending'),
+            ('High', date(2026, 1, 2), 'Pending'),
+            ('Medium', date(2026, 1, 5), 'In Progress'),
+            ('High', None, 'Pending'),
+            ('Low', None, 'In Review'),
+            ('Medium', date(2026, 1, 1), 'Pending'),
+        ]
+        self.tasks = [
+            Task.objects.create(sample=sample, name=f'Task {index}', priority=priority, due_date=due, status=status, analyst=self.analyst)
+            for index, (priority, due, status) in enumerate(specs)
+        ]
+        # Ties on (priority, due date, created_at) fall back to the id.
+        Task.objects.filter(pk__in=[self.tasks[2].pk, self.tasks[6].pk, self.tasks[1].pk, self.tasks[7].pk]).update(created_at=same_time)
+        Task.objects.create(sample=sample, name='Done', priority='High', status='Completed', analyst=self.analyst)
+        Task.objects.create(sample=sample, name='Someone else', priority='High', analyst=self.user)
+
+    def expected(self, tasks):
+        ranks = {'High': 0, 'Medium': 1, 'Low': 2}
+        return [task.pk for task in sorted(
+            (Task.objects.get(pk=task.pk) for task in tasks),
+            key=lambda task: (ranks[task.priority], task.due_date is None, task.due_date or date.min, task.created_at, task.pk),
+        )]
+
+    def page_through(self, **params):
+        ids, url, pages = [], '/api/tasks/queue/', 0
+        response = self.client.get(url, {'page_size': 3, **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            pages += 1
+            if response.data['next'] is None:
+                return ids, pages
+            response = self.client.get(response.data['next'])
+
+    def test_pages_follow_priority_then_due_date(self):
+        ids, pages = self.page_through()
+        self.assertEqual(ids, self.expected(self.tasks))
+        self.assertEqual(pages, 4)
+        # Undated tasks come after the dated ones of the same priority.
+        high = [task.pk for task in self.tasks if task.priority == 'High']
+        self.assertEqual([pk for pk in ids if pk in high], [self.tasks[5].pk, self.tasks[3].pk, self.tasks[1].pk, self.tasks[7].pk])
+
+    def test_filters(self):
+        ids, _ = self.page_through(status='Pending,In Review')
+        self.assertEqual(ids, self.expected([task for task in self.tasks if task.status in ('Pending', 'In Review')]))
+        ids, _ = self.page_through(due_after='2026-01-02', due_before='2026-01-05')
+        self.assertEqual(ids, self.expected([task for task in self.tasks if task.due_date and date(2026, 1, 2) <= task.due_date <= date(2026, 1, 5)]))
+
+    def test_invalid_parameters(self):
+        # Completed tasks are never in the queue.
+        self.assertEqual(self.client.get('/api/tasks/queue/', {'status': 'Completed'}).data['results'], [])
+        self.assertEqual(self.client.get('/api/tasks/queue/', {'status': 'Lost'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/tasks/queue/', {'due_before': '01/05/2026'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/tasks/queue/', {'cursor': 'not-a-cursor'}).status_code, 404)
+
+class SampleTransitionTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.received = Sample.objects.create(sample_id='S-1', name='One', owner=self.user)
+        self.processing = Sample.objects.create(sample_id='S-2', name='Two', owner=self.user, status='Processing')
+        self.analyzed = Sample.objects.create(sample_id='S-3', name='Three', owner=self.user, status='Analyzed')
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        self.foreign = Sample.objects.create(sample_id='S-4', name='Four', owner=other)
+
+    def transition(self, ids, status):
+        return self.client.post('/api/samples/transition/', {'ids': ids, 'status': status}, format='json')
+
+    def test_changed_unchanged_and_not_found(self):
+        ids = [self.received.pk, self.processing.pk, self.analyzed.pk, self.foreign.pk, 999999, self.received.pk]
+        response = self.transition(ids, 'Processing')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data['changed']), [self.received.pk, self.analyzed.pk])
+        self.assertEqual(response.data['unchanged'], [self.processing.pk])
+        # Another user's sample is reported like a missing one, and left alone.
+        self.assertEqual(response.data['not_found'], [self.foreign.pk, 999999])
+        self.assertEqual(Sample.objects.get(pk=self.foreign.pk).status, 'Received')
+        self.assertEqual(set(Sample.objects.filter(owner=self.user).values_list('status', flat=True)), {'Processing'})
+
+    def test_audit_logs_for_changed_samples_only(self):
+        self.transition([self.received.pk, self.processing.pk, self.foreign.pk], 'Processing')
+        logs = AuditLog.objects.order_by('sample_id')
+        self.assertEqual(list(logs.values_list('sample_id', 'actor', 'action')), [
+            (self.received.pk, self.user.pk, "Status changed from 'Received' to 'Processing'."),
+        ])
+        self.assertFalse(AuditLog.objects.filter(sample=self.foreign).exists())
+
+    def test_complete_sets_completed_at(self):
+        self.transition([self.received.pk], 'Complete')
+        self.assertIsNotNone(Sample.objects.get(pk=self.received.pk).completed_at)
+        self.transition([self.received.pk], 'Processing')
+        self.assertIsNone(Sample.objects.get(pk=self.received.pk).completed_at)
+
+    def test_invalid_input(self):
+        self.assertEqual(self.transition([], 'Processing').status_code, 400)
+        self.assertEqual(self.transition([self.received.pk], 'Lost').status_code, 400)
+        self.assertEqual(self.transition(['abc'], 'Processing').status_code, 400)
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.analyst = User.objects.create_user('analyst', 'analyst@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.first = Sample.objects.create(sample_id='S-1', name='One, with a comma', owner=self.user)
+        self.second = Sample.objects.create(sample_id='S-2', name='Two', owner=self.user, status='Processing')
+        Sample.objects.filter(pk=self.first.pk).update(created_at=datetime(2026, 1, 10, 12, tzinfo=dt_timezone.utc))
+        Sample.objects.filter(pk=self.second.pk).update(created_at=datetime(2026, 2, 10, 12, tzinfo=dt_timezone.utc))
+        Task.objects.create(sample=self.first, name='Assay', analyst=self.analyst, result_numeric=Decimal('1.50'))
+        Task.objects.create(sample=self.first, name='QC', due_date=date(2026, 1, 20))
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        Sample.objects.create(sample_id='HIDDEN', name='Hidden', owner=other)
+
+    def export(self, **params):
+        response = self.client.get('/api/samples/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return list(csv.DictReader(b''.join(response.streaming_content).decode('utf-8').splitlines()))
+
+    def test_csv_has_a_row_per_task(self):
+        response = self.client.get('/api/samples/export/')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="samples.csv"')
+        rows = self.export()
+        self.assertEqual(list(rows[0]), [name for name, _ in SAMPLE_COLUMNS])
+        self.assertEqual([(row['sample_id'], row['task_name']) for row in rows], [('S-1', 'Assay'), ('S-1', 'QC'), ('S-2', '')])
+        self.assertEqual(rows[0]['sample_name'], 'One, with a comma')
+        self.assertEqual(rows[0]['sample_created_at'], '2026-01-10T12:00:00Z')
+        self.assertEqual((rows[0]['task_analyst'], rows[0]['task_result_numeric']), ('analyst', '1.500'))
+        self.assertEqual((rows[1]['task_analyst'], rows[1]['task_due_date']), ('', '2026-01-20'))
+
+    def test_filters(self):
+        self.assertEqual({row['sample_id'] for row in self.export(status='Processing')}, {'S-2'})
+        self.assertEqual({row['sample_id'] for row in self.export(**{'from': '2026-02-01'})}, {'S-2'})
+        # A bare date as the upper bound includes that whole day.
+        self.assertEqual({row['sample_id'] for row in self.export(to='2026-01-10')}, {'S-1'})
+        self.assertEqual(self.export(**{'from': '2026-01-10T13:00:00Z', 'to': '2026-02-10T11:00:00Z'}), [])
+
+    def test_invalid_filters(self):
+        for params in ({'status': 'Lost'}, {'from': 'yesterday'}, {'to': '2026-13-01'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/samples/export/', params).status_code, 400)
+        self.assertEqual(self.client.get(f'/api/samples/{self.first.pk}/audit/export/', {'from': 'soon'}).status_code, 400)
+
+class TaskRouteQueryCountTests(APITestCase):
+    """
+    Query-count regression tests for the nested /samples/<pk>/tasks/ routes.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.analyst = User.objects.create_user('analyst', 'analyst@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.sample = Sample.objects.create(sample_id='S-1', name='Sample', owner=self.user)
+        self.tasks = [
+            Task.objects.create(sample=self.sample, name=f'Task {index}', analyst=self.analyst)
+            for index in range(5)
+        ]
+        self.url = f'/api/samples/{self.sample.pk}/tasks/'
+        rebuild(self.user.pk)
+
+    def test_list(self):
+        # The ETag validator, then the tasks themselves.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 5)
+
+    def test_retrieve(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f'{self.url}{self.tasks[0].pk}/')
+        self.assertEqual(response.data['analyst_username'], 'analyst')
+
+    def test_create(self):
+        # Analyst lookup, sample lookup, then savepoint, insert, sample touch,
+        # change event, search document read and upsert, summary update, release.
+        with self.assertNumQueries(10):
+            response = self.client.post(self.url, {'name': 'New', 'analyst': self.analyst.pk})
+        self.assertEqual(response.status_code, 201)
+
+    def test_update(self):
+        with self.assertNumQueries(7):
+            response = self.client.patch(f'{self.url}{self.tasks[0].pk}/', {'status': 'In Review'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_destroy(self):
+        # Includes rebuilding the sample's search document (two queries).
+        with self.assertNumQueries(9):
+            response = self.client.delete(f'{self.url}{self.tasks[0].pk}/')
+        self.assertEqual(response.status_code, 204)
+
+    def test_transition(self):
+        with self.assertNumQueries(7):
+            response = self.client.post(
+                f'{self.url}transition/', {'ids': [task.pk for task in self.tasks], 'status': 'Completed'}, format='json'
+            )
+        self.assertEqual(len(response.data['changed']), 5)
+
+    def test_other_users_sample_is_not_found(self):
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        sample = Sample.objects.create(sample_id='S-2', name='Other', owner=other)
+        task = Task.objects.create(sample=sample, name='Hidden')
+        url = f'/api/samples/{sample.pk}/tasks/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get('/api/samples/999999/tasks/').status_code, 404)
+        self.assertEqual(self.client.get(f'{url}{task.pk}/').status_code, 404)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.post(url, {'name': 'New'}).status_code, 404)
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.sample = Sample.objects.create(sample_id='S-1', name='Sample', owner=self.user)
+
+    def assert_not_modified_until_changed(self, url, change):
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_sample_list(self):
+        self.assert_not_modified_until_changed(
+            '/api/samples/', lambda: self.client.post('/api/samples/', {'sample_id': 'S-2', 'name': 'Two'})
+        )
+
+    def test_sample_list_sees_deletions(self):
+        other = Sample.objects.create(sample_id='S-2', name='Two', owner=self.user)
+        self.assert_not_modified_until_changed('/api/samples/', lambda: self.client.delete(f'/api/samples/{other.pk}/'))
+
+    def test_sample_list_has_no_last_modified(self):
+        # Deleting an older sample leaves the newest updated_at where it was.
+        other = Sample.objects.create(sample_id='S-2', name='Two', owner=self.user)
+        response = self.client.get('/api/samples/')
+        self.assertNotIn('Last-Modified', response)
+        self.client.delete(f'/api/samples/{self.sample.pk}/')
+        since = http_date(other.updated_at.timestamp() + 1)
+        self.assertEqual(self.client.get('/api/samples/', HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+    def test_same_second_writes_are_not_hidden_by_if_modified_since(self):
+        task = Task.objects.create(sample=self.sample, name='Assay')
+        detail, tasks = f'/api/samples/{self.sample.pk}/', f'/api/samples/{self.sample.pk}/tasks/'
+        urls = [detail, tasks, f'{tasks}{task.pk}/']
+        for url in urls:
+            self.assertNotIn('Last-Modified', self.client.get(url))
+        self.client.patch(detail, {'status': 'Processing'})
+        self.client.patch(f'{tasks}{task.pk}/', {'status': 'In Review'})
+        # As if the client's copy were from the same second as the writes.
+        since = http_date(timezone.now().timestamp() + 1)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+    def test_sample_detail_sees_task_changes(self):
+        self.assert_not_modified_until_changed(
+            f'/api/samples/{self.sample.pk}/',
+            lambda: self.client.post(f'/api/samples/{self.sample.pk}/tasks/', {'name': 'Assay'})
+        )
+
+    def test_task_list(self):
+        task = Task.objects.create(sample=self.sample, name='Assay')
+        url = f'/api/samples/{self.sample.pk}/tasks/'
+        self.assert_not_modified_until_changed(
+            url, lambda: self.client.delete(f'{url}{task.pk}/')
+        )
+
+class ChangeFeedTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.user)
+
+    def sync(self, cursor):
+        response = self.client.get('/api/changes/', {'since': cursor})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_changes_and_tombstones(self):
+        first = self.client.post('/api/samples/', {'sample_id': 'S-1', 'name': 'One'}).data['id']
+        second = self.client.post('/api/samples/', {'sample_id': 'S-2', 'name': 'Two'}).data['id']
+        task = self.client.post(f'/api/samples/{first}/tasks/', {'name': 'Assay'}).data['id']
+
+        initial = self.sync(0)
+        self.assertEqual([sample['id'] for sample in initial['samples']], [first, second])
+        self.assertEqual([row['id'] for row in initial['tasks']], [task])
+        self.assertEqual(len(initial['audit_logs']), 2)
+        self.assertFalse(initial['has_more'])
+
+        self.client.patch(f'/api/samples/{first}/', {'status': 'Processing'})
+        self.client.delete(f'/api/samples/{first}/tasks/{task}/')
+        self.client.delete(f'/api/samples/{second}/')
+
+        update = self.sync(initial['next'])
+        self.assertEqual([sample['status'] for sample in update['samples']], ['Processing'])
+        self.assertEqual(update['deleted'], {'samples': [second], 'tasks': [task]})
+        self.assertEqual(len(update['audit_logs']), 1)
+        self.assertEqual(self.sync(update['next'])['samples'], [])
+
+    def test_other_users_changes_are_hidden(self):
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        self.client.force_authenticate(other)
+        self.client.post('/api/samples/', {'sample_id': 'S-1', 'name': 'One'})
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.sync(0)['samples'], [])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/changes/', {'since': 'abc'}).status_code, 400)
+
+    def test_admin_writes_are_recorded(self):
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        sample = Sample.objects.create(sample_id='S-1', name='One', owner=self.user)
+        task = Task.objects.create(sample=sample, name='Assay')
+        cursor = self.sync(0)['next']
+        self.client.force_login(admin_user)
+        response = self.client.post(f'/admin/samples/sample/{sample.pk}/change/', {
+            'sample_id': 'S-1', 'name': 'Renamed', 'owner': self.user.pk, 'status': 'Received', 'version': 1,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.client.post('/admin/samples/task/', {
+            'action': 'delete_selected', '_selected_action': [task.pk], 'post': 'yes',
+        })
+        self.client.force_authenticate(self.user)
+        update = self.sync(cursor)
+        self.assertEqual([row['name'] for row in update['samples']], ['Renamed'])
+        self.assertEqual(update['deleted']['tasks'], [task.pk])
+
+class EventStreamTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.token = Token.objects.get(user=self.user).key
+
+    def test_status_change_is_published_on_commit(self):
+        self.client.force_authenticate(self.user)
+        sample = self.client.post('/api/samples/', {'sample_id': 'S-1', 'name': 'One'}).data['id']
+        with mock.patch('samples.events.get_broker') as get_broker:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(f'/api/samples/{sample}/', {'status': 'Processing'})
+        (owner_id, published), _ = get_broker.return_value.publish.call_args
+        self.assertEqual(owner_id, self.user.pk)
+        self.assertEqual([event['type'] for event in published], ['sample.status', 'audit_log'])
+        self.assertEqual(published[0]['to'], 'Processing')
+
+    def scope(self, query_string=b'', method='GET'):
+        return {
+            'type': 'http', 'method': method, 'path': '/api/events/',
+            'query_string': query_string, 'headers': [],
+        }
+
+    async def test_stream_delivers_published_events(self):
+        app = ApplicationCommunicator(EventStreamApp(None), self.scope(f'token={self.token}'.encode()))
+        await app.send_input({'type': 'http.request', 'body': b''})
+        start = await app.receive_output(1)
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        self.assertEqual((await app.receive_output(1))['body'], b'retry: 5000\n\n')
+
+        events.get_broker().publish(self.user.pk, [events.sample_status_event(1, 'Received', 'Processing')])
+        message = (await app.receive_output(1))['body'].decode()
+        self.assertTrue(message.startswith('event: sample.status\n'))
+        self.assertIn('"to":"Processing"', message)
+
+        await app.send_input({'type': 'http.disconnect'})
+        await app.wait(1)
+        self.assertEqual(events.get_broker().subscriber_count(), 0)
+
+    async def test_stream_requires_token(self):
+        app = ApplicationCommunicator(EventStreamApp(None), self.scope(b'token=invalid'))
+        await app.send_input({'type': 'http.request', 'body': b''})
+        self.assertEqual((await app.receive_output(1))['status'], 401)
+        await app.wait(1)
+
+@override_settings(ROOT_URLCONF='samples.async_urls')
+class AsyncReadViewTests(APITestCase):
+    """
+    The async read views must answer exactly like the DRF views they shadow.
+    Both URL confs are mounted without the /api/ prefix here.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        analyst = User.objects.create_user('analyst', 'analyst@example.com', 'password')
+        self.headers = {'Authorization': f'Token {Token.objects.get(user=self.user).key}'}
+        with self.settings(ROOT_URLCONF='samples.urls'):
+            self.client.force_authenticate(self.user)
+            self.sample = self.client.post('/samples/', {'sample_id': 'S-1', 'name': 'One'}).data['id']
+            self.client.post('/samples/', {'sample_id': 'S-2', 'name': 'Two'})
+            self.client.post(f'/samples/{self.sample}/tasks/', {'name': 'Assay', 'analyst': analyst.pk})
+            self.client.patch(f'/samples/{self.sample}/', {'status': 'Processing'})
+            self.client.force_authenticate(None)
+
+    def async_request(self, method, url, *args, **kwargs):
+        async def request():
+            return await getattr(self.async_client, method)(url, *args, **kwargs)
+        return async_to_sync(request)()
+
+    def async_get(self, url, **headers):
+        return self.async_request('get', url, headers={**self.headers, **headers})
+
+    def drf_get(self, url, **headers):
+        with self.settings(ROOT_URLCONF='samples.urls'):
+            return self.client.get(url, headers={**self.headers, **headers})
+
+    def test_reads_match_drf(self):
+        for url in ['/samples/', '/samples/?page_size=1', f'/samples/{self.sample}/', f'/samples/{self.sample}/tasks/', '/user/']:
+            with self.subTest(url=url):
+                expected = self.drf_get(url)
+                response = self.async_get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(response.get('ETag'), expected.get('ETag'))
+
+    def test_middleware_runs_on_the_event_loop(self):
+        # With DEBUG, Django logs each sync-only middleware it has to run through a thread.
+        with self.settings(DEBUG=True), self.assertNoLogs('django.request', level='DEBUG'):
+            ASGIHandler()
+        self.assertIn('total;dur=', self.async_get('/samples/')['Server-Timing'])
+
+    def test_not_modified(self):
+        etag = self.async_get('/samples/')['ETag']
+        self.assertEqual(self.async_get('/samples/', **{'If-None-Match': etag}).status_code, 304)
+
+    def test_other_requests_fall_back_to_drf(self):
+        missing = self.async_get('/samples/999/')
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(missing.content, self.drf_get('/samples/999/').content)
+        self.assertEqual(self.async_get('/samples/999/tasks/').status_code, 404)
+        self.assertEqual(self.async_request('get', '/samples/').status_code, 401)
+        created = self.async_request(
+            'post', '/samples/', {'sample_id': 'S-3', 'name': 'Three'}, content_type='application/json', headers=self.headers
+        )
+        self.assertEqual(created.status_code, 201)
+
+class BenchmarkCommandTests(TestCase):
+    def test_generate_and_benchmark(self):
+        call_command('generate_lab_data', users=2, samples=4, tasks=2, audit=3, stdout=StringIO())
+        user = User.objects.get(username='lab-user-0')
+        self.assertTrue(Token.objects.filter(user=user).exists())
+        self.assertEqual(Sample.objects.filter(owner=user).count(), 4)
+        self.assertEqual(Task.objects.filter(sample__owner=user).count(), 8)
+        self.assertEqual(AuditLog.objects.filter(sample__owner=user).count(), 12)
+        summary = LabSummary.objects.get(owner=user)
+        self.assertEqual(
+            summary.samples_received + summary.samples_processing + summary.samples_analyzed + summary.samples_complete, 4
+        )
+
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command(
+                'benchmark_api', username='lab-user-0', iterations=2, warmup=0,
+                endpoints=['sample-list', 'sample-audit', 'sample-search', 'sample-create'], output=output.name, stdout=StringIO()
+            )
+            results = json.load(output)
+        self.assertEqual([row['name'] for row in results['endpoints']], ['sample-list', 'sample-audit', 'sample-search', 'sample-create'])
+        self.assertEqual([row['status'] for row in results['endpoints']], [200, 200, 200, 201])
+        self.assertTrue(all(row['queries'] > 0 for row in results['endpoints']))
+        # Benchmarked writes are rolled back.
+        self.assertEqual(Sample.objects.filter(owner=user).count(), 4)
+
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        histograms.clear()
+
+    def test_server_timing_and_histograms(self):
+        self.client.post('/api/samples/', {'sample_id': 'S-1', 'name': 'One'})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/samples/')
+        # Read the count now; later requests reset connection.queries.
+        query_count = len(queries)
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn(f'desc="{query_count} queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        routes = self.client.get('/api/metrics/').data['routes']
+        self.assertEqual(routes['GET sample-list']['count'], 1)
+        self.assertEqual(routes['GET sample-list']['mean_queries'], query_count)
+
+    def test_fast_reads_count_as_serializer_time(self):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            with mock.patch('samples.metrics.time.perf_counter', side_effect=[10.0, 10.25]):
+                ValuesSerializer.for_serializer(TaskSerializer).serialize([])
+        finally:
+            current_metrics.reset(token)
+        self.assertEqual(metrics.serializer_seconds, 0.25)
+
+    def test_repeated_query_shapes_are_flagged(self):
+        metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            for index in range(N_PLUS_ONE_THRESHOLD):
+                User.objects.filter(pk=index).exists()
+            Sample.objects.exists()
+        repeated = metrics.repeated_queries()
+        self.assertEqual(list(repeated.values()), [N_PLUS_ONE_THRESHOLD])
+        self.assertIn('auth_user', next(iter(repeated)))
+
+class FastReadSerializerTests(APITestCase):
+    """
+    List and retrieve go through ValuesSerializer; the bytes must match the
+    DRF serializers they replace.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        analyst = User.objects.create_user('analyst', 'analyst@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.sample = self.client.post('/api/samples/', {'sample_id': 'S-1', 'name': 'One'}).data['id']
+        self.client.post('/api/samples/', {'sample_id': 'S-2', 'name': 'Two'})
+        self.client.post(f'/api/samples/{self.sample}/tasks/', {
+            'name': 'Assay', 'analyst': analyst.pk, 'due_date': '2026-01-31', 'result_numeric': '1.5',
+            'result_text': 'Pass', 'priority': 'High',
+        })
+        self.task = self.client.post(f'/api/samples/{self.sample}/tasks/', {'name': 'QC'}).data['id']
+        self.client.patch(f'/api/samples/{self.sample}/', {'status': 'Complete'})
+        # The actor was deleted (SET_NULL): DRF leaves actor_username out.
+        AuditLog.objects.create(sample_id=self.sample, actor=None, action='Imported.')
+
+    def test_output_matches_drf_serializers(self):
+        urls = [
+            '/api/samples/',
+            '/api/samples/?page_size=1',
+            '/api/samples/?expand=full',
+            f'/api/samples/{self.sample}/',
+            f'/api/samples/{self.sample}/tasks/',
+            f'/api/samples/{self.sample}/tasks/{self.task}/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                fast = self.client.get(url)
+                with self.settings(FAST_READ_SERIALIZERS=False):
+                    expected = self.client.get(url)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, expected.content)
+        logs = self.client.get(f'/api/samples/{self.sample}/').json()['audit_logs']
+        self.assertEqual([('actor_username' in log) for log in logs], [True, True, False])
+
+    def test_missing_rows_are_not_found(self):
+        fast = self.client.get('/api/samples/999/')
+        with self.settings(FAST_READ_SERIALIZERS=False):
+            expected = self.client.get('/api/samples/999/')
+        self.assertEqual(fast.status_code, 404)
+        self.assertEqual(fast.content, expected.content)
+
+    def test_unsupported_serializers_are_not_compiled(self):
+        class ComputedSerializer(SampleSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta(SampleSerializer.Meta):
+                fields = SampleSerializer.Meta.fields + ['label']
+
+        self.assertIsNone(ValuesSerializer.for_serializer(ComputedSerializer))
+        self.assertIsNotNone(ValuesSerializer.for_serializer(SampleSerializer))
+
+class FastJSONTests(APITestCase):
+    """
+    FastJSONRenderer and FastJSONParser must give the same results as DRF's
+    JSONRenderer and JSONParser; large responses are gzipped on request.
+    """
+    def test_renderer_matches_drf(self):
+        data = {
+            'decimal': Decimal('1.500'),
+            'utc': datetime(2026, 1, 2, 3, 4, 5, 600, tzinfo=dt_timezone.utc),
+            'offset': datetime(2026, 1, 2, 3, 4, 5, tzinfo=dt_timezone(timedelta(hours=2))),
+            'naive': datetime(2026, 1, 2, 3, 4, 5),
+            'date': date(2026, 1, 2),
+            'time': time(3, 4, 5),
+            'text': 'caf\u00e9 \u2028\u2029 "quoted"',
+            'lazy': gettext_lazy('This field is required.'),
+            'nested': [{'id': 1, 'ok': True, 'none': None}],
+            'big': 2 ** 70,
+        }
+        for renderer_context in (None, {'indent': 2}):
+            with self.subTest(renderer_context=renderer_context):
+                self.assertEqual(
+                    FastJSONRenderer().render(data, renderer_context=renderer_context),
+                    JSONRenderer().render(data, renderer_context=renderer_context),
+                )
+
+    def test_parser_matches_drf(self):
+        bodies = [b'{"a": [1, 2.5, "caf\xc3\xa9"], "b": null}', b'123456789012345678901234567890', b'{"a": 1,}', b'NaN']
+        for body in bodies:
+            with self.subTest(body=body):
+                try:
+                    expected = JSONParser().parse(BytesIO(body))
+                except ParseError as exc:
+                    with self.assertRaisesMessage(ParseError, str(exc.detail)):
+                        FastJSONParser().parse(BytesIO(body))
+                else:
+                    self.assertEqual(FastJSONParser().parse(BytesIO(body)), expected)
+
+    @override_settings(COMPRESSION_MIN_LENGTH=1024)
+    def test_large_responses_are_compressed(self):
+        user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(user)
+        for index in range(20):
+            Sample.objects.create(sample_id=f'S-{index}', name=f'Sample {index}', owner=user)
+
+        response = self.client.get('/api/samples/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        plain = self.client.get('/api/samples/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+        small = self.client.get('/api/user/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertLess(len(small.content), 1024)
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+    @override_settings(COMPRESSION_MIN_LENGTH=0)
+    def test_token_responses_are_not_compressed(self):
+        User.objects.create_user('owner', 'owner@example.com', 'password')
+        login = self.client.post('/api/login/', {'username': 'owner', 'password': 'password'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertIn('token', login.json())
+        self.assertFalse(login.has_header('Content-Encoding'))
+        error = self.client.post('/api/login/', {'username': 'owner'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(error.has_header('Content-Encoding'))
+
+class AuditArchiveTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.sample = Sample.objects.create(sample_id='S-1', name='Sample', owner=self.user)
+        now = timezone.now()
+        for days in (400, 300, 200, 100, 1):
+            log = AuditLog.objects.create(sample=self.sample, actor=self.user, action=f'{days} days ago')
+            AuditLog.objects.filter(pk=log.pk).update(timestamp=now - timedelta(days=days))
+        # Only entry, and old: kept as the sample's latest action.
+        self.other = Sample.objects.create(sample_id='S-2', name='Other', owner=self.user)
+        log = AuditLog.objects.create(sample=self.other, actor=self.user, action='Sample registered.')
+        AuditLog.objects.filter(pk=log.pk).update(timestamp=now - timedelta(days=500))
+        self.history = list(AuditLog.objects.filter(sample=self.sample).order_by('-timestamp').values_list('id', flat=True))
+        record_changes(self.user.pk, ChangeKind.AUDIT_LOG, AuditLog.objects.values_list('id', flat=True))
+
+    def test_archive_keeps_recent_and_latest_entries(self):
+        out = StringIO()
+        call_command('archive_audit_logs', '--older-than-days', '150', '--dry-run', stdout=out)
+        self.assertIn('3 audit logs', out.getvalue())
+        call_command('archive_audit_logs', '--older-than-days', '150', '--batch-size', '2', stdout=StringIO())
+
+        self.assertEqual(ArchivedAuditLog.objects.count(), 3)
+        self.assertEqual(sorted(AuditLog.objects.filter(sample=self.sample).values_list('id', flat=True)), sorted(self.history[:2]))
+        self.assertTrue(AuditLog.objects.filter(sample=self.other).exists())
+        detail = self.client.get(f'/api/samples/{self.sample.pk}/').data
+        self.assertEqual([log['id'] for log in detail['audit_logs']], sorted(self.history[:2]))
+
+    @skipIf(connection.vendor != 'sqlite', "Reads SQLite's query plan.")
+    def test_batches_walk_the_timestamp_index(self):
+        plan = archivable(timezone.now()).order_by('timestamp', 'id').values('id')[:1000].explain()
+        self.assertIn('auditlog_ts_id_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_history_pages_across_both_tables(self):
+        before = self.client.get(f'/api/samples/{self.sample.pk}/audit/').data['results']
+        call_command('archive_audit_logs', '--older-than-days', '150', stdout=StringIO())
+
+        pages, url = [], f'/api/samples/{self.sample.pk}/audit/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data['results'])
+            url = response.data['next']
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual([row for page in pages for row in page], before)
+        self.assertEqual([row['id'] for row in before], self.history)
+        self.assertEqual(before[0]['actor_username'], 'owner')
+
+        export = self.client.get(f'/api/samples/{self.sample.pk}/audit/export/?format=ndjson')
+        exported = [json.loads(line)['id'] for line in b''.join(export.streaming_content).splitlines()]
+        self.assertEqual(exported, self.history[::-1])
+
+        changes = self.client.get('/api/changes/?since=0').data
+        self.assertEqual(len(changes['audit_logs']), 6)
+
+    def test_history_is_owner_scoped(self):
+        intruder = User.objects.create_user('intruder', 'intruder@example.com', 'password')
+        self.client.force_authenticate(intruder)
+        self.assertEqual(self.client.get(f'/api/samples/{self.sample.pk}/audit/').status_code, 404)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(f'/api/samples/{self.sample.pk}/audit/?cursor=bad').status_code, 404)
+
+class SampleSearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.ids = {}
+        for sample_id, name in [('LAB-002', 'Plasma'), ('LAB-001', 'Serum panel'), ('XYZ-1', 'Soil core')]:
+            self.ids[sample_id] = self.client.post('/api/samples/', {'sample_id': sample_id, 'name': name}).data['id']
+        self.task = self.client.post(f"/api/samples/{self.ids['XYZ-1']}/tasks/", {
+            'name': 'Serum check', 'result_text': 'Passed',
+        }).data['id']
+
+    def search(self, query, **params):
+        response = self.client.get('/api/samples/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['sample_id'] for row in response.data['results']]
+
+    def test_prefix_and_full_text_matches(self):
+        self.assertEqual(self.search('lab'), ['LAB-001', 'LAB-002'])
+        self.assertEqual(sorted(self.search('seru')), ['LAB-001', 'XYZ-1'])
+        self.assertEqual(self.search('serum pan'), ['LAB-001'])
+        self.assertEqual(self.search('pass'), ['XYZ-1'])
+        self.assertEqual(self.search('nothing'), [])
+
+        row = self.client.get('/api/samples/search/', {'q': 'soil'}).data['results'][0]
+        self.assertEqual(row['task_count'], 1)
+
+    def test_index_follows_writes(self):
+        self.client.patch(f"/api/samples/{self.ids['XYZ-1']}/tasks/{self.task}/", {'result_text': 'Failed'})
+        self.assertEqual(self.search('pass'), [])
+        self.assertEqual(self.search('failed'), ['XYZ-1'])
+        self.client.patch(f"/api/samples/{self.ids['LAB-002']}/", {'name': 'Urine'})
+        self.assertEqual(self.search('urine'), ['LAB-002'])
+        self.client.delete(f"/api/samples/{self.ids['XYZ-1']}/tasks/{self.task}/")
+        self.assertEqual(self.search('serum'), ['LAB-001'])
+        self.client.delete(f"/api/samples/{self.ids['LAB-001']}/")
+        self.assertEqual(self.search('serum'), [])
+
+        self.client.post('/api/samples/bulk/', [{'sample_id': 'BULK-1', 'name': 'Bulk', 'tasks': [{'name': 'Titration'}]}], format='json')
+        self.assertEqual(self.search('titration'), ['BULK-1'])
+
+    def test_results_are_owner_scoped_and_paginated(self):
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        self.client.force_authenticate(other)
+        self.client.post('/api/samples/', {'sample_id': 'LAB-900', 'name': 'Serum'})
+        self.assertEqual(self.search('lab'), ['LAB-900'])
+        self.client.force_authenticate(self.user)
+
+        found, url = [], '/api/samples/search/?q=p&page_size=1'
+        while url:
+            data = self.client.get(url).data
+            found += [row['sample_id'] for row in data['results']]
+            url = data['next']
+        self.assertEqual(sorted(found), ['LAB-001', 'LAB-002', 'XYZ-1'])
+        self.assertEqual(self.client.get('/api/samples/search/').status_code, 400)
+
+class ResultAnalyticsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.sample = Sample.objects.create(sample_id='S-1', name='Sample', owner=self.user)
+        self.values = ['1.5', '2.25', '3', '4', '100']
+        for value in self.values:
+            Task.objects.create(sample=self.sample, name='Assay', result_numeric=Decimal(value))
+        Task.objects.create(sample=self.sample, name='Assay')
+        Task.objects.create(sample=self.sample, name='QC', result_numeric=Decimal('7'))
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        other_sample = Sample.objects.create(sample_id='S-2', name='Other', owner=other)
+        Task.objects.create(sample=other_sample, name='Assay', result_numeric=Decimal('9999'))
+
+    def test_statistics_per_task_name(self):
+        response = self.client.get('/api/analytics/results/', {'usl': '50'})
+        self.assertEqual(response.status_code, 200)
+        assay, qc = response.data['tasks']
+        values = [float(value) for value in self.values]
+        mean, stddev = statistics.fmean(values), statistics.stdev(values)
+        self.assertEqual((assay['name'], assay['count'], qc['name'], qc['count']), ('Assay', 5, 'QC', 1))
+        self.assertAlmostEqual(assay['mean'], mean, places=5)
+        self.assertAlmostEqual(assay['stddev'], stddev, places=5)
+        self.assertEqual((assay['min'], assay['max']), (1.5, 100.0))
+        self.assertEqual(assay['percentiles']['p50'], 3.0)
+        self.assertAlmostEqual(assay['percentiles']['p25'], 2.25)
+        self.assertAlmostEqual(assay['control_limits']['upper'], mean + 3 * stddev, places=5)
+        self.assertEqual(assay['out_of_control'], 0)
+        self.assertEqual(assay['out_of_spec'], 1)
+        self.assertEqual(sum(bucket['count'] for bucket in assay['trend']), 5)
+        self.assertIsNone(qc['stddev'])
+        self.assertIsNone(qc['control_limits'])
+
+        only_qc = self.client.get('/api/analytics/results/', {'task': 'QC', 'bucket': 'month'}).data
+        self.assertEqual([row['name'] for row in only_qc['tasks']], ['QC'])
+        self.assertIsNone(only_qc['tasks'][0]['out_of_spec'])
+        self.assertEqual(self.client.get('/api/analytics/results/', {'bucket': 'year'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/analytics/results/', {'lsl': 'low'}).status_code, 400)
+
+    def test_deleting_a_sample_is_not_hidden_by_if_modified_since(self):
+        first = self.client.get('/api/analytics/results/')
+        self.assertNotIn('Last-Modified', first)
+        other = Sample.objects.create(sample_id='S-3', name='Newest', owner=self.user)
+        self.client.delete(f'/api/samples/{self.sample.pk}/')
+        since = http_date(other.updated_at.timestamp() + 1)
+        response = self.client.get('/api/analytics/results/', HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['tasks'], [])
+        self.assertEqual(self.client.get('/api/analytics/results/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    @skipIf(analytics.numpy is None, 'NumPy is not installed')
+    def test_numpy_and_pure_python_agree(self):
+        tasks = analytics.result_tasks(self.user, QueryDict())
+        arrays = analytics.load_values(tasks)
+        self.assertIsInstance(arrays['Assay'], analytics.numpy.ndarray)
+        with mock.patch('samples.analytics.numpy', None):
+            lists = analytics.load_values(tasks)
+            self.assertIsInstance(lists['Assay'], list)
+            expected = {name: analytics.describe(values, 2, 50) for name, values in lists.items()}
+        self.assertEqual(sorted(arrays), sorted(lists))
+        for name, values in arrays.items():
+            with self.subTest(name=name):
+                self.assertEqual(sorted(values.tolist()), sorted(lists[name]))
+                actual = analytics.describe(values, 2, 50)
+                self.assertEqual(actual.keys(), expected[name].keys())
+                for key in ('count', 'min', 'max', 'out_of_control', 'out_of_spec'):
+                    self.assertEqual(actual[key], expected[name][key])
+                self.assertAlmostEqual(actual['mean'], expected[name]['mean'], places=5)
+                for key, value in expected[name]['percentiles'].items():
+                    self.assertAlmostEqual(actual['percentiles'][key], value, places=5)
+        self.assertEqual(analytics.describe(arrays['Assay'], 2, 50)['out_of_spec'], 2)
+
+    def test_results_are_cached_until_the_data_changes(self):
+        first = self.client.get('/api/analytics/results/')
+        # Auth is forced, so only the validators query runs on a cache hit.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/analytics/results/').data, first.data)
+        with self.assertNumQueries(1):
+            not_modified = self.client.get('/api/analytics/results/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        task = Task.objects.get(name='QC')
+        self.client.patch(f'/api/samples/{self.sample.pk}/tasks/{task.pk}/', {'result_numeric': '8'})
+        qc = self.client.get('/api/analytics/results/', HTTP_IF_NONE_MATCH=first['ETag']).data['tasks'][1]
+        self.assertEqual(qc['mean'], 8.0)
+
+@override_settings(
+    REPLICA_DATABASE='replica', DATABASE_ROUTERS=['samples.replicas.ReplicaRouter'], REPLICA_READ_YOUR_WRITES_SECONDS=60
+)
+class ReplicaRoutingTests(APITransactionTestCase):
+    """
+    Runs against two separate SQLite databases holding different rows, so
+    each response shows which database it was read from. Not wrapped in a
+    transaction: the router keeps reads inside one on the primary.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        # bulk_create skips the signal that would create a token on the primary.
+        User.objects.using('replica').bulk_create([User(pk=self.user.pk, username='owner')])
+        self.sample = Sample.objects.create(sample_id='PRIMARY-1', name='Primary', owner=self.user)
+        Sample.objects.using('replica').create(pk=self.sample.pk, sample_id='REPLICA-1', name='Replica', owner_id=self.user.pk)
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        # The flush after each test skips the replica, which the router keeps out of migrations.
+        Sample.objects.using('replica').all().delete()
+        User.objects.using('replica').all().delete()
+
+    def sample_ids(self):
+        return [row['sample_id'] for row in self.client.get('/api/samples/').data['results']]
+
+    def test_reads_use_the_replica_until_the_user_writes(self):
+        self.assertEqual(self.sample_ids(), ['REPLICA-1'])
+        self.assertEqual(self.client.get(f'/api/samples/{self.sample.pk}/').data['sample_id'], 'REPLICA-1')
+        export = self.client.get('/api/samples/export/?format=ndjson')
+        self.assertIn(b'REPLICA-1', b''.join(export.streaming_content))
+
+        response = self.client.post('/api/samples/', {'sample_id': 'PRIMARY-2', 'name': 'New'})
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(Sample.objects.using('replica').filter(sample_id='PRIMARY-2').exists())
+        self.assertEqual(self.sample_ids(), ['PRIMARY-2', 'PRIMARY-1'])
+
+        # Once the pin expires, reads go back to the replica.
+        caches['default'].delete(pin_key(self.user.pk))
+        self.assertEqual(self.sample_ids(), ['REPLICA-1'])
+
+    def test_metrics_count_replica_queries(self):
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = self.client.get('/api/samples/')
+        self.assertGreater(len(replica_queries), 0)
+        self.assertIn(f'desc="{len(replica_queries)} queries"', response['Server-Timing'])
+
+    def test_other_endpoints_and_unconfigured_setups_use_the_primary(self):
+        self.assertEqual(self.client.get('/api/dashboard/').data['samples_by_status']['Received'], 1)
+        with self.settings(REPLICA_DATABASE=None):
+            self.assertEqual(self.sample_ids(), ['PRIMARY-1'])
+        self.assertIsNone(read_database.get())
+
+class OptimisticConcurrencyTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.sample = Sample.objects.create(sample_id='S-1', name='Sample', owner=self.user)
+        self.task = Task.objects.create(sample=self.sample, name='Assay')
+        self.url = f'/api/samples/{self.sample.pk}/'
+        rebuild(self.user.pk)
+
+    def status_logs(self):
+        return list(AuditLog.objects.filter(sample=self.sample).values_list('action', flat=True))
+
+    def test_updates_bump_the_version_and_if_match_must_name_it(self):
+        self.assertEqual(self.client.get(self.url).data['version'], 1)
+        response = self.client.patch(self.url, {'status': 'Processing'}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['version'], 2)
+
+        # A stale or unknown tag fails without writing anything.
+        for tag in ('"1"', 'W/"1"', '"abc"'):
+            response = self.client.patch(self.url, {'status': 'Complete'}, HTTP_IF_MATCH=tag)
+            self.assertEqual(response.status_code, 412)
+        self.sample.refresh_from_db()
+        self.assertEqual((self.sample.status, self.sample.version), ('Processing', 2))
+        self.assertEqual(len(self.status_logs()), 1)
+
+        for tag, version in (('"1", "2"', 3), ('*', 4)):
+            response = self.client.patch(self.url, {'name': f'Renamed {version}'}, HTTP_IF_MATCH=tag)
+            self.assertEqual(response.data['version'], version)
+
+        # The ETag served with the sample works as If-Match until the sample changes.
+        etag = self.client.get(self.url)['ETag']
+        self.assertTrue(etag.startswith('W/"4.'))
+        self.assertEqual(self.client.patch(self.url, {'name': 'Tagged'}, HTTP_IF_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.patch(self.url, {'name': 'Stale'}, HTTP_IF_MATCH=etag).status_code, 412)
+
+        task_url = f'{self.url}tasks/{self.task.pk}/'
+        self.assertEqual(self.client.patch(task_url, {'status': 'In Review'}, HTTP_IF_MATCH='"2"').status_code, 412)
+        etag = self.client.get(task_url)['ETag']
+        response = self.client.patch(task_url, {'status': 'In Review'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.data['version'], 2)
+
+    def test_bulk_transitions_bump_the_version(self):
+        self.client.post('/api/samples/transition/', {'ids': [self.sample.pk], 'status': 'Analyzed'}, format='json')
+        self.assertEqual(self.client.patch(self.url, {'status': 'Complete'}, HTTP_IF_MATCH='"1"').status_code, 412)
+        self.assertEqual(self.client.get(self.url).data['version'], 2)
+
+    def test_a_write_between_read_and_update_is_a_conflict(self):
+        original = Sample.save_if_version
+
+        def overtaken(sample, expected):
+            # Another request commits its update after this one read the row.
+            Sample.objects.filter(pk=sample.pk).update(status='Analyzed', version=expected + 1)
+            return original(sample, expected)
+
+        with mock.patch.object(Sample, 'save_if_version', overtaken):
+            response = self.client.patch(self.url, {'status': 'Processing'})
+            self.assertEqual(response.status_code, 409)
+            response = self.client.patch(self.url, {'status': 'Processing'}, HTTP_IF_MATCH='"1"')
+            self.assertEqual(response.status_code, 412)
+        self.assertEqual(self.status_logs(), [])
+        self.assertEqual(rebuild(self.user.pk).samples_received, 1)
+
+class ConcurrentUpdateTests(APITransactionTestCase):
+    """
+    Many clients change the same sample at once, each from the version it
+    read. Exactly one wins, and only its change is logged.
+    """
+    CLIENTS = 8
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.sample = Sample.objects.create(sample_id='S-1', name='Sample', owner=self.user)
+        rebuild(self.user.pk)
+
+    def patch_concurrently(self, bodies, **headers):
+        original = Sample.save_if_version
+        barrier = threading.Barrier(len(bodies))
+
+        def after_everyone_read(sample, expected):
+            barrier.wait()
+            return original(sample, expected)
+
+        def patch(body):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                return client.patch(f'/api/samples/{self.sample.pk}/', body, **headers)
+            finally:
+                connection.close()
+
+        with mock.patch.object(Sample, 'save_if_version', after_everyone_read):
+            with ThreadPoolExecutor(len(bodies)) as executor:
+                return list(executor.map(patch, bodies))
+
+    def test_one_status_change_wins(self):
+        statuses = ['Processing', 'Analyzed', 'Complete'] * 3
+        responses = self.patch_concurrently([{'status': value} for value in statuses[:self.CLIENTS]])
+        codes = sorted(response.status_code for response in responses)
+        self.assertEqual(codes, [200] + [409] * (self.CLIENTS - 1))
+
+        winner = next(response for response in responses if response.status_code == 200)
+        self.sample.refresh_from_db()
+        self.assertEqual((self.sample.status, self.sample.version), (winner.data['status'], 2))
+        self.assertEqual(
+            list(AuditLog.objects.filter(sample=self.sample).values_list('action', flat=True)),
+            [f"Status changed from 'Received' to '{winner.data['status']}'."]
+        )
+
+    def test_retrying_clients_lose_no_updates(self):
+        # Each client increments a counter kept in the name, retrying on 412.
+        Sample.objects.filter(pk=self.sample.pk).update(name='0')
+        url = f'/api/samples/{self.sample.pk}/'
+
+        def increment(_):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                for attempt in range(1, 100):
+                    current = client.get(url).data
+                    response = client.patch(
+                        url, {'name': str(int(current['name']) + 1)}, HTTP_IF_MATCH=f'"{current["version"]}"'
+                    )
+                    if response.status_code != 412:
+                        self.assertEqual(response.status_code, 200)
+                        return attempt
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.CLIENTS) as executor:
+            attempts = list(executor.map(increment, range(self.CLIENTS)))
+        self.assertNotIn(None, attempts)
+        self.sample.refresh_from_db()
+        self.assertEqual((self.sample.name, self.sample.version), (str(self.CLIENTS), self.CLIENTS + 1))
+
+@override_settings(THROTTLE={
+    'ENABLED': True,
+    'RATES': {'read': '3/min', 'write': '2/min', 'bulk': '1/min', 'login': '2/min'},
+})
+class ThrottleTests(APITestCase):
+    def setUp(self):
+        buckets.clear()
+        token_cache.clear()
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user.auth_token.key}')
+        # As after the user's first request: only verified tokens get buckets of their own.
+        token_cache.set(self.user.auth_token.key, self.user, self.user.auth_token)
+
+    def test_over_limit_requests_get_429_before_any_query(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/samples/').status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/user/')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '20')
+        self.assertIn('20 seconds', response.json()['detail'])
+
+        # Writes, bulk requests and other users have buckets of their own.
+        self.assertEqual(self.client.post('/api/samples/', {'sample_id': 'S-1', 'name': 'One'}).status_code, 201)
+        transition = {'ids': [1], 'status': 'Complete'}
+        self.assertEqual(self.client.post('/api/samples/transition/', transition, format='json').status_code, 200)
+        self.assertEqual(self.client.post('/api/samples/transition/', transition, format='json').status_code, 429)
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {other.auth_token.key}')
+        self.assertEqual(self.client.get('/api/samples/').status_code, 200)
+
+    def test_unverified_tokens_count_per_ip(self):
+        statuses = []
+        for index in range(5):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token made-up-{index}')
+            statuses.append(self.client.get('/api/samples/').status_code)
+        self.assertEqual(statuses, [401, 401, 401, 429, 429])
+        # The verified user still has their own bucket.
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.user.auth_token.key}')
+        self.assertEqual(self.client.get('/api/samples/').status_code, 200)
+
+    def test_limits_apply_under_asgi(self):
+        headers = {'Authorization': f'Token {self.user.auth_token.key}'}
+        async def get():
+            return [(await self.async_client.get('/api/samples/', headers=headers)).status_code for _ in range(4)]
+        self.assertEqual(async_to_sync(get)(), [200, 200, 200, 429])
+
+    def test_forwarded_for_does_not_mint_buckets(self):
+        self.client.credentials()
+        statuses = [
+            self.client.post(
+                '/api/login/', {'username': 'owner', 'password': 'wrong'}, HTTP_X_FORWARDED_FOR=f'203.0.113.{index}'
+            ).status_code
+            for index in range(4)
+        ]
+        self.assertEqual(statuses, [400, 400, 429, 429])
+
+    def test_login_is_limited_per_ip(self):
+        credentials = {'username': 'owner', 'password': 'wrong'}
+        self.client.credentials()
+        for _ in range(2):
+            self.assertEqual(self.client.post('/api/login/', credentials).status_code, 400)
+        with mock.patch('django.contrib.auth.hashers.check_password') as check_password:
+            response = self.client.post('/api/login/', {'username': 'owner', 'password': 'password'})
+        self.assertEqual(response.status_code, 429)
+        check_password.assert_not_called()
+        self.assertEqual(self.client.post('/api/login/', credentials, REMOTE_ADDR='10.0.0.2').status_code, 400)
+
+    def test_buckets_refill_and_can_be_shared(self):
+        self.assertEqual(parse_rate('12/min'), (12, 5.0))
+        capacity, interval = 2, 5.0
+        tat = None
+        for now, expected_wait in ((0, 0), (0, 0), (1, 4), (5, 0), (5, 5)):
+            tat, wait = admit(tat, now, capacity, interval)
+            self.assertEqual(wait, expected_wait)
+
+        # Two processes sharing a cache share the limit.
+        caches['default'].clear()
+        first, second = TokenBuckets(shared_cache='default'), TokenBuckets(shared_cache='default')
+        self.assertEqual([first.take('key', 2, 60), second.take('key', 2, 60)], [0, 0])
+        self.assertGreater(second.take('key', 2, 60), 0)
+        self.assertEqual(TokenBuckets().take('key', 2, 60), 0)
@@ -0,0 +1,184 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from rest_framework.exceptions import Throttled
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+from rest_framework.views import APIView
+from .authentication import token_cache
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """
+    '<requests>/<period>' (period s, min, hour or day, like DRF's rates) as
+    `(capacity, interval)`: the burst size and the seconds it takes to
+    earn one request back.
+    """
+    count, period = rate.split('/')
+    count = int(count)
+    seconds = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+    return count, seconds / count
+
+def admit(tat, now, capacity, interval):
+    """
+    One step of a token bucket of `capacity` requests that refills one every
+    `interval` seconds, kept as its theoretical arrival time (GCRA): the
+    time at which the bucket would be full again, or None for a full one.
+    Returns `(tat, wait)`; wait is 0 when the request is admitted, else the
+    seconds until it would be.
+    """
+    tat = now if tat is None or tat < now else tat
+    wait = tat + interval - now - capacity * interval
+    if wait > 0:
+        return tat, wait
+    return tat + interval, 0.0
+
+class TokenBuckets:
+    """
+    Thread-safe token buckets for this process: a bounded LRU of key ->
+    theoretical arrival time, so a check is one dict lookup under a lock.
+    With `shared_cache` (a CACHES alias), requests this process admits are
+    also checked against buckets in that cache, which enforces the limit
+    across processes. The shared check is a get and a set, not atomic, so
+    racing processes can let a few requests over the limit through.
+    """
+    def __init__(self, max_size=100000, shared_cache=None):
+        self.max_size = max_size
+        self.shared_cache_alias = shared_cache
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'THROTTLE', {})
+        return cls(max_size=options.get('MAX_BUCKETS', 100000), shared_cache=options.get('SHARED_CACHE'))
+
+    @property
+    def shared_cache(self):
+        return caches[self.shared_cache_alias] if self.shared_cache_alias else None
+
+    def shared_key(self, key):
+        # Keys carry auth tokens; never use them raw as cache keys.
+        return 'throttle:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def take(self, key, capacity, interval):
+        """Take a request from `key`'s bucket. Returns 0 if admitted, else the seconds to wait."""
+        wait = self.take_local(key, capacity, interval)
+        if wait or self.shared_cache is None:
+            return wait
+        return self.take_shared(key, capacity, interval)
+
+    def take_local(self, key, capacity, interval):
+        """The in-process half of take(); never blocks on I/O."""
+        now = time.monotonic()
+        with self._lock:
+            tat, wait = admit(self._buckets.get(key), now, capacity, interval)
+            self._buckets[key] = tat
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def take_shared(self, key, capacity, interval):
+        # Wall-clock time: the monotonic clock is not comparable across processes.
+        cache, key, now = self.shared_cache, self.shared_key(key), time.time()
+        tat, wait = admit(cache.get(key), now, capacity, interval)
+        if not wait:
+            cache.set(key, tat, math.ceil(tat - now) + 1)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+buckets = TokenBuckets.from_settings()
+ident = BaseThrottle()
+
+def throttle_scope(request, view_func):
+    """
+    The scope a request counts against: the view's (or viewset action's)
+    `throttle_scope`, else read for safe methods and write for the rest.
+    None for views that are not part of the API, such as the admin.
+    """
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None or not (issubclass(view_class, APIView) or hasattr(view_class, 'throttle_scope')):
+        return None
+    initkwargs = getattr(view_func, 'initkwargs', None) or {}
+    scope = initkwargs.get('throttle_scope') or getattr(view_class, 'throttle_scope', None)
+    if scope is not None:
+        return scope
+    return 'read' if request.method in SAFE_METHODS else 'write'
+
+def client_key(request, scope):
+    """
+    Requests with a token this process has already authenticated count per
+    token (so per user); everything else, including unknown or made-up
+    tokens and every login, counts per client IP. Checking the token cache
+    is a dict lookup, and random tokens cannot mint buckets of their own.
+    """
+    if scope != 'login':
+        auth = request.META.get('HTTP_AUTHORIZATION', '').split()
+        if len(auth) == 2 and auth[0].lower() == 'token' and token_cache.is_known(auth[1]):
+            return f'{scope}:token:{auth[1]}'
+    return f'{scope}:ip:{ident.get_ident(request)}'
+
+def bucket_for(request, view_func):
+    """`(key, capacity, interval)` of the bucket the request takes from, or None when it is not throttled."""
+    options = settings.THROTTLE
+    if not options['ENABLED']:
+        return None
+    scope = throttle_scope(request, view_func)
+    rate = options['RATES'].get(scope)
+    if rate is None:
+        return None
+    return (client_key(request, scope), *parse_rate(rate))
+
+def throttled(wait):
+    """A 429 for a request that must wait `wait` seconds, or None if it was admitted."""
+    if not wait:
+        return None
+    retry_after = math.ceil(wait)
+    response = JsonResponse({'detail': str(Throttled(retry_after).detail)}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+class ThrottleMiddleware:
+    """
+    Applies the THROTTLE rates once the URL is resolved and before the view
+    runs, so an over-limit request is answered with a 429 and Retry-After
+    before authentication, parsing or any query. Under ASGI the check runs
+    on the event loop; only a shared cache lookup goes to a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django runs a sync process_view through a thread in async mode.
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        # A coroutine in async mode, which the handler awaits.
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        bucket = bucket_for(request, view_func)
+        return throttled(buckets.take(*bucket)) if bucket is not None else None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        bucket = bucket_for(request, view_func)
+        if bucket is None:
+            return None
+        wait = buckets.take_local(*bucket)
+        if not wait and buckets.shared_cache is not None:
+            wait = await sync_to_async(buckets.take_shared)(*bucket)
+        return throttled(wait)
@@ -1,6 +1,8 @@
 from django.urls import include, path
-from rest_framework.authtoken.views import obtain_auth_token
-from .views import RegisterView, SampleViewSet, TaskViewSet, UserDetailView
+from .views import (
+    ChangesView, DashboardView, LoginView, MetricsView, RegisterView, ResultAnalyticsView, SampleViewSet,
+    TaskQueueView, TaskViewSet, UserDetailView,
+)
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested import routers
 
@@ -16,8 +18,13 @@ samples_router.register(r'tasks', TaskViewSet, basename='sample-tasks')
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
-    path('login/', obtain_auth_token, name='login'),
+    path('login/', LoginView.as_view(), name='login'),
     path('user/', UserDetailView.as_view(), name='user-detail'),
+    path('tasks/queue/', TaskQueueView.as_view(), name='task-queue'),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('changes/', ChangesView.as_view(), name='changes'),
+    path('analytics/results/', ResultAnalyticsView.as_view(), name='analytics-results'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 
     path('', include(router.urls)),
     path('', include(samples_router.urls)),
@@ -1,11 +1,38 @@
+import os
+from datetime import date
 from django.contrib.auth.models import User
-from django.forms import ValidationError
-from rest_framework import generics, viewsets
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Func, IntegerField, Max, OuterRef, Prefetch, Subquery
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import generics, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.views import APIView
-from .serializers import UserSerializer, SampleSerializer, ReadOnlyUserSerializer, TaskSerializer
-from .models import Sample, AuditLog, Task
+from .archive import audit_tiers
+from .concurrency import save_versioned
+from .conditional import ConditionalGetMixin, check_conditional, etag_only
+from .exports import AUDIT_COLUMNS, SAMPLE_COLUMNS, audit_export_rows, export_response, sample_export_rows
+from .fast_serializers import FastReadMixin, ValuesSerializer
+from .metrics import histograms
+from .pagination import AuditHistoryPagination, SampleCursorPagination, SearchPagination, TaskQueueKeysetPagination
+from .parsers import FastJSONParser, NDJSONParser
+from .renderers import CSVRenderer, NDJSONRenderer
+from .replicas import ReplicaReadMixin
+from .serializers import (
+    BULK_MAX_ITEMS, UserSerializer, SampleSerializer, SampleListSerializer, BulkSampleSerializer,
+    ReadOnlyUserSerializer, TaskSerializer, SampleTransitionSerializer, TaskTransitionSerializer,
+    TaskQueueSerializer, ChangeSampleSerializer, ChangeAuditLogSerializer, AuditLogSerializer
+)
+from .changes import changes_since, parse_cursor, record_changes
+from . import analytics, events
+from .models import Sample, AuditLog, ChangeKind, SampleStatus, Task, TaskStatus
+from .search import reindex, search_samples
+from .summary import SummaryDelta, dashboard
 
 # Create your views here.
 
@@ -16,65 +43,450 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = UserSerializer
+    # Hashes a password, like login.
+    throttle_scope = 'login'
 
-class SampleViewSet(viewsets.ModelViewSet):
+    def perform_create(self, serializer):
+        """
+        Save the user, its token and the signup notification atomically.
+        """
+        with transaction.atomic():
+            serializer.save()
+
+def apply_status_transition(queryset, ids, target, fields=(), **updates):
+    """
+    Move every row of `queryset` whose pk is in `ids` to the `target` status.
+    The rows are locked and read with one query and updated with one UPDATE;
+    must be called inside a transaction. `fields` are extra columns to read
+    and `updates` extra columns to set on the changed rows, whose version is
+    bumped so concurrent single-row updates see the change.
+    Returns `(changed, unchanged, not_found)` where `changed` holds the rows
+    as they were before the update, as dicts with 'pk', 'status' and `fields`.
+    """
+    current = {
+        row['pk']: row
+        for row in queryset.select_for_update(of=('self',)).filter(pk__in=ids).values('pk', 'status', *fields)
+    }
+    changed = [row for row in current.values() if row['status'] != target]
+    unchanged = [row['pk'] for row in current.values() if row['status'] == target]
+    not_found = [pk for pk in dict.fromkeys(ids) if pk not in current]
+    if changed:
+        queryset.filter(pk__in=[row['pk'] for row in changed]).update(
+            status=target, updated_at=timezone.now(), version=F('version') + 1, **updates
+        )
+    return changed, unchanged, not_found
+
+def count_of(queryset):
+    """A correlated COUNT(*) over `queryset`, without the GROUP BY an aggregate over a join adds."""
+    return Subquery(
+        queryset.order_by().annotate(count=Func(F('pk'), function='COUNT')).values('count'),
+        output_field=IntegerField()
+    )
+
+def with_list_annotations(queryset):
+    """
+    Annotate samples with what SampleListSerializer shows instead of their
+    nested rows. Every value is a correlated subquery per row, so the list
+    keeps using its (owner, created_at, id) index and only the page's rows
+    are counted.
+    """
+    latest_log = AuditLog.objects.filter(sample=OuterRef('pk')).order_by('-timestamp', '-id')
+    tasks = Task.objects.filter(sample=OuterRef('pk'))
+    return queryset.annotate(
+        task_count=count_of(tasks),
+        open_task_count=count_of(tasks.exclude(status=TaskStatus.COMPLETED)),
+        latest_action=Subquery(latest_log.values('action')[:1]),
+        latest_action_at=Subquery(latest_log.values('timestamp')[:1]),
+    )
+
+def list_validators(result):
+    """Conditional validators for the sample list from its Max(updated_at) / Count aggregate, ETag only."""
+    return etag_only((result['last_modified'], result['count']))
+
+class SampleViewSet(ReplicaReadMixin, ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows samples to be viewed or edited.
+
+    The list is cursor-paginated and uses a slim representation (task counts
+    and the latest audit entry). Pass `?expand=full` to get the nested tasks
+    and audit logs on the list as well; retrieve always returns the full form.
     """
     serializer_class = SampleSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SampleCursorPagination
+    lookup_value_regex = '[0-9]+'
+    # Set per action for the bulk ones (see samples.throttling).
+    throttle_scope = None
     # queryset = Sample.objects.all()
 
+    def is_slim_list(self):
+        """True when the list should use the slim representation."""
+        return self.action == 'list' and self.request.query_params.get('expand') != 'full'
+
+    def get_conditional_validators(self):
+        """
+        The newest updated_at and the row count. Task changes touch their
+        sample's updated_at, so they count too. ETag only (see etag_only).
+        """
+        samples = Sample.objects.filter(owner=self.request.user)
+        if self.action == 'retrieve':
+            return etag_only(samples.filter(pk=self.kwargs['pk']).values_list('updated_at', 'id', 'version').first())
+        return list_validators(samples.aggregate(last_modified=Max('updated_at'), count=Count('id')))
+
+    def get_serializer_class(self): # type: ignore
+        if self.is_slim_list():
+            return SampleListSerializer
+        return SampleSerializer
+
     def get_queryset(self): # type: ignore
         """
         This view should only return samples owned by the currently authenticated user.
         """
-        return Sample.objects.filter(owner=self.request.user).prefetch_related('tasks', 'audit_logs')
+        queryset = Sample.objects.filter(owner=self.request.user).select_related('owner')
+        if self.is_slim_list():
+            return with_list_annotations(queryset)
+        # Load the users behind analyst_username/actor_username with the
+        # prefetches instead of one query per task and audit log.
+        return queryset.prefetch_related(
+            Prefetch('tasks', queryset=Task.objects.select_related('analyst')),
+            Prefetch('audit_logs', queryset=AuditLog.objects.select_related('actor')),
+        )
+
+    def update(self, request, *args, **kwargs):
+        """
+        As DRF's update, but the response is built from the sample reloaded
+        through get_queryset(), so its tasks and audit logs come with their
+        users from the prefetches instead of one query per row.
+        """
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        instance = self.get_queryset().get(pk=instance.pk)
+        return Response(self.get_serializer(instance).data)
 
     def perform_create(self, serializer):
         """
         Set the owner of the new sample to the logged-in user.
         """
-        sample = serializer.save(owner=self.request.user)
-        AuditLog.objects.create(
-            sample=sample,
-            actor=self.request.user,
-            action="Sample registered."
-        )
+        with transaction.atomic():
+            sample = serializer.save(owner=self.request.user)
+            log = AuditLog.objects.create(
+                sample=sample,
+                actor=self.request.user,
+                action="Sample registered."
+            )
+            record_changes(self.request.user.pk, ChangeKind.SAMPLE, [sample.pk])
+            record_changes(self.request.user.pk, ChangeKind.AUDIT_LOG, [log.pk])
+            events.publish(self.request.user.pk, [events.audit_log_event(log, self.request.user)])
+            reindex([sample.pk])
+            summary = SummaryDelta(self.request.user.pk)
+            summary.add_sample(sample.status, sample.created_at, sample.completed_at)
+            summary.apply()
 
     def perform_update(self, serializer):
         """
-        Create an audit log when the sample is updated.
+        Create an audit log when the sample is updated. The update only
+        applies over the version read here (see samples.concurrency), so of
+        two concurrent status changes only the winner is logged; the other
+        gets a 409, or a 412 when it sent If-Match.
         """
         old_status = serializer.instance.status
-        
-        sample = serializer.save()
-        
-        if old_status != sample.status:
-            AuditLog.objects.create(
-                sample=sample,
-                actor=self.request.user,
-                action=f"Status changed from '{old_status}' to '{sample.status}'."
+        old_completed_at = serializer.instance.completed_at
+        old_name = serializer.instance.name
+
+        with transaction.atomic():
+            sample = save_versioned(serializer, self.request)
+            record_changes(sample.owner_id, ChangeKind.SAMPLE, [sample.pk])
+            if old_name != sample.name:
+                reindex([sample.pk])
+
+            if old_status != sample.status:
+                log = AuditLog.objects.create(
+                    sample=sample,
+                    actor=self.request.user,
+                    action=f"Status changed from '{old_status}' to '{sample.status}'."
+                )
+                record_changes(sample.owner_id, ChangeKind.AUDIT_LOG, [log.pk])
+                events.publish(sample.owner_id, [
+                    events.sample_status_event(sample.pk, old_status, sample.status),
+                    events.audit_log_event(log, self.request.user),
+                ])
+                summary = SummaryDelta(sample.owner_id)
+                summary.remove_sample(old_status, sample.created_at, old_completed_at)
+                summary.add_sample(sample.status, sample.created_at, sample.completed_at)
+                summary.apply()
+
+    def perform_destroy(self, instance):
+        """
+        Remove the sample and its tasks from the owner's dashboard summary
+        and leave a tombstone in the change feed. Its tasks and audit logs
+        go with it, so they get no tombstones of their own.
+        """
+        with transaction.atomic():
+            record_changes(instance.owner_id, ChangeKind.SAMPLE, [instance.pk], deleted=True)
+            summary = SummaryDelta(instance.owner_id)
+            summary.remove_sample(instance.status, instance.created_at, instance.completed_at)
+            task_counts = Task.objects.filter(sample=instance).values('status').annotate(count=Count('id')).order_by()
+            for row in task_counts:
+                summary.remove_task(row['status'], row['count'])
+            instance.delete()
+            summary.apply()
+
+    @action(
+        detail=False, methods=['post'], url_path='bulk', parser_classes=[FastJSONParser, NDJSONParser],
+        throttle_scope='bulk'
+    )
+    def bulk(self, request):
+        """
+        Register many samples (with optional nested tasks) in one request.
+        Accepts a JSON array or an NDJSON body. Valid items are written with
+        bulk inserts inside a single transaction; invalid items are reported
+        by index and do not abort the rest of the batch.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'detail': 'Expected a list of samples.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_MAX_ITEMS:
+            return Response(
+                {'detail': f'A bulk request may contain at most {BULK_MAX_ITEMS} samples.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Resolve every referenced analyst with one query instead of one per task.
+        analyst_ids = set()
+        for item in items:
+            tasks = item.get('tasks') if isinstance(item, dict) else None
+            for task in tasks if isinstance(tasks, list) else []:
+                analyst = task.get('analyst') if isinstance(task, dict) else None
+                if isinstance(analyst, int) or (isinstance(analyst, str) and analyst.isdigit()):
+                    analyst_ids.add(int(analyst))
+        context = {'request': request, 'users': User.objects.in_bulk(analyst_ids)}
+
+        errors = []
+        valid = []
+        for index, item in enumerate(items):
+            serializer = BulkSampleSerializer(data=item, context=context)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        # Check sample_id uniqueness for the whole batch in one query.
+        existing = set(Sample.objects.filter(
+            sample_id__in=[data['sample_id'] for _, data in valid]
+        ).values_list('sample_id', flat=True))
+        seen = set()
+        accepted = []
+        for index, data in valid:
+            if data['sample_id'] in existing or data['sample_id'] in seen:
+                errors.append({'index': index, 'errors': {'sample_id': ['sample with this sample id already exists.']}})
+                continue
+            seen.add(data['sample_id'])
+            accepted.append((index, data))
+
+        try:
+            with transaction.atomic():
+                samples = self._bulk_insert(request.user, accepted)
+        except IntegrityError:
+            # Another request registered one of these sample_ids concurrently.
+            return Response(
+                {'detail': 'A sample in this batch was registered concurrently. Please retry.'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        created = [
+            {'index': index, 'id': sample.pk, 'sample_id': sample.sample_id}
+            for sample, (index, _) in zip(samples, accepted)
+        ]
+        errors.sort(key=lambda error: error['index'])
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'created': created, 'errors': errors}, status=response_status)
+
+    @action(detail=False, methods=['post'], url_path='transition', throttle_scope='bulk')
+    def transition(self, request):
+        """
+        Move many samples to one status with a single UPDATE and write their
+        "Status changed" audit logs with one bulk insert.
+        """
+        serializer = SampleTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target = serializer.validated_data['status']
+
+        now = timezone.now()
+        completed_at = now if target == SampleStatus.COMPLETE else None
+
+        with transaction.atomic():
+            changed, unchanged, not_found = apply_status_transition(
+                Sample.objects.filter(owner=request.user), serializer.validated_data['ids'], target,
+                fields=('created_at', 'completed_at'), completed_at=completed_at
             )
+            logs = AuditLog.objects.bulk_create([
+                AuditLog(
+                    sample_id=row['pk'],
+                    actor=request.user,
+                    action=f"Status changed from '{row['status']}' to '{target}'."
+                )
+                for row in changed
+            ])
+            record_changes(request.user.pk, ChangeKind.SAMPLE, [row['pk'] for row in changed])
+            record_changes(request.user.pk, ChangeKind.AUDIT_LOG, [log.pk for log in logs])
+            events.publish(request.user.pk, [
+                *(events.sample_status_event(row['pk'], row['status'], target) for row in changed),
+                *(events.audit_log_event(log, request.user) for log in logs),
+            ])
+            summary = SummaryDelta(request.user.pk)
+            for row in changed:
+                summary.remove_sample(row['status'], row['created_at'], row['completed_at'])
+                summary.add_sample(target, row['created_at'], completed_at)
+            summary.apply()
+
+        return Response({
+            'changed': [row['pk'] for row in changed],
+            'unchanged': unchanged,
+            'not_found': not_found,
+        })
+
+    @action(
+        detail=False, methods=['get'], url_path='export', renderer_classes=[CSVRenderer, NDJSONRenderer],
+        throttle_scope='bulk'
+    )
+    def export(self, request):
+        """
+        Stream every sample, one row per task, as CSV (default) or NDJSON
+        (`?format=ndjson` or `Accept: application/x-ndjson`).
+        Optional filters: `status`, and `from`/`to` on created_at.
+        """
+        rows = sample_export_rows(request.user, request.query_params)
+        return export_response(request.accepted_renderer.format, SAMPLE_COLUMNS, rows, 'samples')
+
+    @action(detail=False, methods=['get'], url_path='search', pagination_class=SearchPagination)
+    def search(self, request):
+        """
+        Search the user's samples. `?q=` matches the start of sample_id, and
+        words starting with each of its terms in the sample name, task names
+        and task results. Best matches first, in the slim list form; follow
+        `next` for more.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': ['This query parameter is required.']})
+        ids = self.paginate_queryset(lambda offset, limit: search_samples(request.user, query, offset, limit))
+        values_serializer = ValuesSerializer.for_serializer(SampleListSerializer)
+        samples = with_list_annotations(Sample.objects.filter(owner=request.user, pk__in=ids))
+        rows = {row['pk']: row for row in values_serializer.values(samples)}
+        return self.get_paginated_response(values_serializer.serialize([rows[pk] for pk in ids if pk in rows]))
+
+    @action(detail=True, methods=['get'], url_path='audit', pagination_class=AuditHistoryPagination)
+    def audit(self, request, pk=None):
+        """
+        Page through the full audit history of one sample, newest first.
+        The sample itself only embeds recent entries; older ones are moved
+        to the archive by `manage.py archive_audit_logs` and served from
+        there. Follow `next` for older entries.
+        """
+        if not Sample.objects.filter(pk=pk, owner=request.user).exists():
+            raise Http404
+        values_serializer = ValuesSerializer.for_serializer(AuditLogSerializer)
+        tiers = [values_serializer.values(queryset) for queryset in audit_tiers(request.user, sample_pk=pk)]
+        page = self.paginate_queryset(tiers)
+        return self.get_paginated_response(values_serializer.serialize(page))
 
-class TaskViewSet(viewsets.ModelViewSet):
+    @action(
+        detail=True, methods=['get'], url_path='audit/export', renderer_classes=[CSVRenderer, NDJSONRenderer],
+        throttle_scope='bulk'
+    )
+    def audit_export(self, request, pk=None):
+        """
+        Stream the audit history of one sample as CSV or NDJSON.
+        Optional filters: `from`/`to` on the log timestamp.
+        """
+        if not Sample.objects.filter(pk=pk, owner=request.user).exists():
+            raise Http404
+        rows = audit_export_rows(request.user, request.query_params, sample_pk=pk)
+        return export_response(request.accepted_renderer.format, AUDIT_COLUMNS, rows, f'sample-{pk}-audit')
+
+    def _bulk_insert(self, user, accepted):
+        """Insert validated samples, their tasks and audit logs with one query per table."""
+        samples = [
+            Sample(owner=user, **{k: v for k, v in data.items() if k != 'tasks'})
+            for _, data in accepted
+        ]
+        for sample in samples:
+            sample.sync_completed_at()
+        samples = Sample.objects.bulk_create(samples)
+        tasks = Task.objects.bulk_create([
+            Task(sample=sample, **task_data)
+            for sample, (_, data) in zip(samples, accepted)
+            for task_data in data.get('tasks', [])
+        ])
+        logs = AuditLog.objects.bulk_create([
+            AuditLog(sample=sample, actor=user, action="Sample registered.")
+            for sample in samples
+        ])
+        record_changes(user.pk, ChangeKind.SAMPLE, [sample.pk for sample in samples])
+        record_changes(user.pk, ChangeKind.TASK, [task.pk for task in tasks])
+        record_changes(user.pk, ChangeKind.AUDIT_LOG, [log.pk for log in logs])
+        reindex([sample.pk for sample in samples])
+        events.publish(user.pk, [events.audit_log_event(log, user) for log in logs])
+        summary = SummaryDelta(user.pk)
+        for sample in samples:
+            summary.add_sample(sample.status, sample.created_at, sample.completed_at)
+        for task in tasks:
+            summary.add_task(task.status)
+        summary.apply()
+        return samples
+
+class TaskViewSet(ReplicaReadMixin, ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = None
 
-    def get_sample(self):
-        """Helper function to get the parent sample."""
-        try:
-            sample = Sample.objects.get(
-                pk=self.kwargs['sample_pk'], owner=self.request.user
+    def get_conditional_validators(self):
+        """
+        Every task write touches the parent sample, so its updated_at
+        validates the whole task list; a single task uses its own. The same
+        query checks the sample exists and is the user's. ETag only (see
+        etag_only).
+        """
+        if self.action == 'retrieve':
+            return etag_only(
+                self.get_queryset().filter(pk=self.kwargs['pk']).values_list('updated_at', 'id', 'version').first()
             )
-            return sample
-        except Sample.DoesNotExist:
-            raise ValidationError("Sample not found.")
+        validators = Sample.objects.filter(
+            pk=self.kwargs['sample_pk'], owner=self.request.user
+        ).values_list('updated_at', 'id').first()
+        if validators is None:
+            raise Http404
+        return etag_only(validators)
+
+    def touch_sample(self):
+        """Bump the parent sample's updated_at so its cached representations are invalidated."""
+        Sample.objects.filter(pk=self.kwargs['sample_pk']).update(updated_at=timezone.now())
+
+    def get_sample(self):
+        """
+        Helper function to get the parent sample, or 404.
+        The lookup runs at most once per request.
+        """
+        if not hasattr(self, '_sample'):
+            self._sample = get_object_or_404(Sample, pk=self.kwargs['sample_pk'], owner=self.request.user)
+        return self._sample
 
     def get_queryset(self): # type: ignore
-        """This view should only return tasks for the specified sample."""
-        sample = self.get_sample()
-        return Task.objects.filter(sample=sample)
+        """
+        This view should only return tasks for the specified sample.
+        Ownership is checked in the same query through the join on the sample.
+        """
+        return Task.objects.filter(
+            sample_id=self.kwargs['sample_pk'], sample__owner=self.request.user
+        ).select_related('analyst')
 
     def perform_create(self, serializer):
         """
@@ -82,7 +494,181 @@ class TaskViewSet(viewsets.ModelViewSet):
         The serializer now handles the 'analyst' ID automatically.
         """
         sample = self.get_sample()
-        serializer.save(sample=sample)
+        with transaction.atomic():
+            task = serializer.save(sample=sample)
+            self.touch_sample()
+            record_changes(sample.owner_id, ChangeKind.TASK, [task.pk])
+            reindex([sample.pk])
+            summary = SummaryDelta(sample.owner_id)
+            summary.add_task(task.status)
+            summary.apply()
+
+    def perform_update(self, serializer):
+        old_status = serializer.instance.status
+        old_text = (serializer.instance.name, serializer.instance.result_text)
+        with transaction.atomic():
+            task = save_versioned(serializer, self.request)
+            self.touch_sample()
+            record_changes(self.request.user.pk, ChangeKind.TASK, [task.pk])
+            if old_text != (task.name, task.result_text):
+                reindex([task.sample_id])
+            if old_status != task.status:
+                events.publish(self.request.user.pk, [
+                    events.task_status_event(task.pk, task.sample_id, old_status, task.status)
+                ])
+                summary = SummaryDelta(self.request.user.pk)
+                summary.remove_task(old_status)
+                summary.add_task(task.status)
+                summary.apply()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_changes(self.request.user.pk, ChangeKind.TASK, [instance.pk], deleted=True)
+            instance.delete()
+            self.touch_sample()
+            reindex([instance.sample_id])
+            summary = SummaryDelta(self.request.user.pk)
+            summary.remove_task(instance.status)
+            summary.apply()
+
+    @action(detail=False, methods=['post'], url_path='transition', throttle_scope='bulk')
+    def transition(self, request, sample_pk=None):
+        """Move many tasks of this sample to one status with a single UPDATE."""
+        serializer = TaskTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target = serializer.validated_data['status']
+
+        with transaction.atomic():
+            changed, unchanged, not_found = apply_status_transition(
+                self.get_queryset(), serializer.validated_data['ids'], target
+            )
+            if changed:
+                self.touch_sample()
+            record_changes(request.user.pk, ChangeKind.TASK, [row['pk'] for row in changed])
+            events.publish(request.user.pk, [
+                events.task_status_event(row['pk'], int(sample_pk), row['status'], target) for row in changed
+            ])
+            summary = SummaryDelta(request.user.pk)
+            for row in changed:
+                summary.remove_task(row['status'])
+                summary.add_task(target)
+            summary.apply()
+
+        return Response({
+            'changed': [row['pk'] for row in changed],
+            'unchanged': unchanged,
+            'not_found': not_found,
+        })
+
+class TaskQueueView(generics.ListAPIView):
+    """
+    API endpoint for the current user's open tasks across all samples,
+    ordered by priority, then due date (undated last), then age.
+
+    Optional filters: `status` (comma-separated open statuses),
+    `due_before` and `due_after` (YYYY-MM-DD, inclusive).
+    """
+    serializer_class = TaskQueueSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = TaskQueueKeysetPagination
+
+    def get_queryset(self): # type: ignore
+        queryset = Task.objects.filter(analyst=self.request.user).exclude(
+            status=TaskStatus.COMPLETED
+        ).select_related('sample', 'analyst')
+
+        params = self.request.query_params
+        if params.get('status'):
+            statuses = params['status'].split(',')
+            invalid = [value for value in statuses if value not in TaskStatus.values]
+            if invalid:
+                raise ValidationError({'status': [f'"{value}" is not a valid choice.' for value in invalid]})
+            queryset = queryset.filter(status__in=statuses)
+        for param, lookup in (('due_before', 'due_date__lte'), ('due_after', 'due_date__gte')):
+            if params.get(param):
+                try:
+                    queryset = queryset.filter(**{lookup: date.fromisoformat(params[param])})
+                except ValueError:
+                    raise ValidationError({param: ['Date has wrong format. Use YYYY-MM-DD.']})
+        return queryset
+
+class DashboardView(APIView):
+    """
+    API endpoint for the lab dashboard: sample and task counts by status,
+    overdue tasks per analyst and average turnaround (registered to complete).
+    Counts come from the incrementally maintained LabSummary row.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        return Response(dashboard(request.user))
+
+class ResultAnalyticsView(APIView):
+    """
+    API endpoint for statistics on numeric task results, per task name:
+    count, mean, standard deviation, percentiles, control limits (mean +/-
+    3 sigma) with the number of results outside them, and the mean per
+    `bucket` (day, week or month) of updated_at. Filter with `task`
+    (repeatable) and `from`/`to`; pass `lsl`/`usl` spec limits to count
+    out-of-spec results. Answers conditional GETs with a 304.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        current = analytics.validators(request.user)
+        # ETag only: deleting a sample does not move the newest updated_at.
+        not_modified, headers = check_conditional(request._request, request.user, etag_only(current))
+        if not_modified is not None:
+            return not_modified
+        return Response(analytics.result_analytics(request.user, request.query_params, current), headers=headers)
+
+class ChangesView(APIView):
+    """
+    API endpoint for the samples, tasks and audit logs that changed after a
+    cursor, so clients can keep a local replica in sync.
+    Start with `?since=0` and pass back `next` until `has_more` is false;
+    deleted samples and tasks are listed under `deleted`.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        cursor = parse_cursor(request.query_params.get('since'))
+        next_cursor, has_more, samples, tasks, audit_logs, deleted = changes_since(request.user, cursor)
+        return Response({
+            'next': str(next_cursor),
+            'has_more': has_more,
+            'samples': ChangeSampleSerializer(samples, many=True).data,
+            'tasks': TaskQueueSerializer(tasks, many=True).data,
+            'audit_logs': ChangeAuditLogSerializer(audit_logs, many=True).data,
+            'deleted': {
+                'samples': deleted[ChangeKind.SAMPLE],
+                'tasks': deleted[ChangeKind.TASK],
+            },
+        })
+
+class MetricsView(APIView):
+    """
+    Admin-only endpoint with the request latency histograms and query
+    averages per route, as recorded by RequestMetricsMiddleware. The numbers
+    cover the process that answers, since the last restart.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response({'pid': os.getpid(), 'routes': histograms.snapshot()})
+
+class LoginView(ObtainAuthToken):
+    """
+    API endpoint that returns the user's auth token. Every call runs a full
+    password hash, so it has its own, tight throttle per client IP.
+    """
+    throttle_scope = 'login'
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # The token must not be gzipped (see samples.compression).
+        response.carries_secret = True
+        return response
 
 class UserDetailView(APIView):
     """